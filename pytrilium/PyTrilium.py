@@ -1,10 +1,12 @@
 from .PyTriliumCustomClient import PyTriliumCustomClient
+from .PyTriliumTracing import traced
+from .PyTriliumTransport import HTTPXTransport
 
 from datetime import datetime
 
 
 class PyTrilium(PyTriliumCustomClient):
-    def __init__(self, url, token=None, password=None, debug=False) -> None:
+    def __init__(self, url, token=None, password=None, debug=False, pool_maxsize=10, http2=False) -> None:
         """Initializes the PyTrilium class. You need to either provide an ETAPI token OR a password (which will then be used to generate an ETAPI token).
 
         Parameters
@@ -17,12 +19,18 @@ class PyTrilium(PyTriliumCustomClient):
             If you would like to enable debugging, set this to True, by default False
         password : str, optional
             The password for the Trilium instance. This can be found in the Trilium settings. This is only required if you are using Trilium's built-in authentication, by default None
+        pool_maxsize : int, optional
+            The maximum number of connections to keep open to Trilium, raise this if you make many requests at the same time, by default 10
+        http2 : bool, optional
+            If True, requests are sent over HTTP/2 through httpx, so that many requests at the same time share one connection. Requires `pip install pytrilium[http2]`, by default False
         """
         super().__init__(url, token, debug)
 
         # Set up the requests session, the validate that either a password or a token was provided
         # If not, return an error
-        self.make_requests_session()
+        self.make_requests_session(pool_maxsize=pool_maxsize)
+        if http2:
+            self.set_transport(HTTPXTransport(self.session.headers, max_connections=pool_maxsize, retries=self.retries))
         if not token and not password:
             raise ValueError("You must provide either a token or a password.")
         if password:
@@ -34,6 +42,7 @@ class PyTrilium(PyTriliumCustomClient):
         # Attempt a basic call to make sure that the token is valid
         self.attempt_basic_call()
 
+    @traced
     def auth_login(self, password: str) -> str:
         """Authenticate to Trilium using a password. This should not be called manually. This will return the token that can be used to authenticate to Trilium in future requests.
 
@@ -54,6 +63,7 @@ class PyTrilium(PyTriliumCustomClient):
         resp = self.make_request("/auth/login", data=data, method="POST")
         return resp.json()["authToken"]
 
+    @traced
     def create_backup(self, backup_name: str = datetime.today().strftime("%m_%d_%Y")) -> bool:
         """Create a backup that is placed on Trilium's server. This should not be called manually.
 
@@ -73,10 +83,12 @@ class PyTrilium(PyTriliumCustomClient):
         else:
             return False
 
+    @traced
     def auth_logout(self):
         """Logs out of Trilium. This should not be called manually."""
         self.make_request("/auth/logout", method="POST")
 
+    @traced
     def get_inbox_note(self, date: str):
         """Get the inbox's note for a date.
 
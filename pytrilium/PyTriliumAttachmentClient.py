@@ -1,11 +1,13 @@
 import requests
 from .PyTriliumClient import PyTriliumClient
+from .PyTriliumTracing import traced
 
 
 class PyTriliumAttachmentClient(PyTriliumClient):
     def __init__(self, url, token, debug=False) -> None:
         super().__init__(url, token, debug)
 
+    @traced
     def create_attachment(self, data: str) -> dict:
         """Create a new attachment.
 
@@ -21,6 +23,7 @@ class PyTriliumAttachmentClient(PyTriliumClient):
         """
         return self.make_request("/attachments", method="POST", data=data).json()
 
+    @traced
     def get_attachment_by_id(self, attachment_id: str) -> dict:
         """Given the Attachment's ID, this will return the Attachment's metadata.
 
@@ -36,6 +39,7 @@ class PyTriliumAttachmentClient(PyTriliumClient):
         """
         return self.make_request(f"/attachments/{attachment_id}").json()
 
+    @traced
     def patch_attachment_by_id(self, attachment_id: str, data: str) -> dict:
         """Given the Attachment's ID, this will update the Attachment's metadata.
 
@@ -53,6 +57,7 @@ class PyTriliumAttachmentClient(PyTriliumClient):
         """
         return self.make_request(f"/attachments/{attachment_id}", method="PATCH", data=data).json()
 
+    @traced
     def delete_attachment_by_id(self, attachment_id: str) -> dict:
         """Given the Attachment's ID, this will delete the Attachment.
 
@@ -68,6 +73,7 @@ class PyTriliumAttachmentClient(PyTriliumClient):
         """
         return self.make_request(f"/attachments/{attachment_id}", method="DELETE").json()
 
+    @traced
     def get_attachment_content_by_id(self, attachment_id: str) -> bytes:
         """Given the Attachment's ID, this will return the Attachment's content.
 
@@ -81,8 +87,68 @@ class PyTriliumAttachmentClient(PyTriliumClient):
         bytes
             The content of the attachment as bytes.
         """
-        return self.make_request(f"/attachments/{attachment_id}/content").content
+        cache_validator = None
+        if self.disk_cache is not None:
+            attachment = self.make_request(f"/attachments/{attachment_id}").json()
+            cache_validator = attachment.get("blobId") or attachment.get("utcDateModified")
+        return self.make_request(f"/attachments/{attachment_id}/content", cache_validator=cache_validator).content
+
+    @traced
+    def download_attachment_content_by_id(
+        self, attachment_id: str, filepath: str, resume: bool = True, segments: int = 1
+    ) -> int:
+        """Given the Attachment's ID, this will save the Attachment's content to a file, without holding it in memory. If
+        the download is interrupted, calling this again continues it, as long as the Attachment's content hasn't changed.
 
+        Parameters
+        ----------
+        attachment_id : str
+            Trilium's ID for the Attachment.
+        filepath : str
+            Where to save the content.
+        resume : bool, optional
+            If a previous, unfinished download of this file should be continued, by default True
+        segments : int, optional
+            How many parts of the content to download at the same time, by default 1
+
+        Returns
+        -------
+        int
+            The size of the saved content.
+        """
+        attachment = self.make_request(f"/attachments/{attachment_id}").json()
+        return self.download_file(
+            f"/attachments/{attachment_id}/content",
+            filepath,
+            resume=resume,
+            segments=segments,
+            validator=attachment.get("blobId") or attachment.get("utcDateModified"),
+            expected_size=attachment.get("contentLength"),
+        )
+
+    @traced
+    def get_attachment_content_view_by_id(self, attachment_id: str) -> memoryview:
+        """Given the Attachment's ID, this will return the Attachment's content as a read-only view of its bytes. When the
+        disk cache is enabled, the cached content is memory-mapped instead of being copied into memory, which is the
+        cheapest way to read large attachments.
+
+        Parameters
+        ----------
+        attachment_id : str
+            Trilium's ID for the Attachment.
+
+        Returns
+        -------
+        memoryview
+            The content of the attachment.
+        """
+        cache_validator = None
+        if self.disk_cache is not None:
+            attachment = self.make_request(f"/attachments/{attachment_id}").json()
+            cache_validator = attachment.get("blobId") or attachment.get("utcDateModified")
+        return self.get_content_view(f"/attachments/{attachment_id}/content", cache_validator)
+
+    @traced
     def put_attachment_content_by_id(self, attachment_id: str, data: bytes) -> dict:
         """Given the Attachment's ID, this will update the Attachment's content.
 
@@ -1,11 +1,21 @@
+import json
+
 import requests
 from .PyTriliumClient import PyTriliumClient
+from .PyTriliumTracing import traced
 
 
 class PyTriliumAttributeClient(PyTriliumClient):
     def __init__(self, url, token, debug=False) -> None:
         super().__init__(url, token, debug)
 
+        # (type, name) -> noteId -> the note's own attributes of that type and name, filled in by the bulk helpers below
+        # so that the notes' attributes don't have to be fetched again for every operation
+        self.attribute_index = {}
+        # The notes whose attributes are in `attribute_index`
+        self.indexed_note_ids = set()
+
+    @traced
     def get_attribute_by_id(self, attribute_id: str) -> dict:
         """Given the Attribute's ID, this will return the Attribute's information.
 
@@ -21,6 +31,7 @@ class PyTriliumAttributeClient(PyTriliumClient):
         """
         return self.make_request(f"/attributes/{attribute_id}").json()
 
+    @traced
     def post_attribute(self, data: str) -> dict:
         """This will create a new Attribute.
 
@@ -36,6 +47,7 @@ class PyTriliumAttributeClient(PyTriliumClient):
         """
         return self.make_request("/attributes", method="POST", data=data).json()
 
+    @traced
     def patch_attribute_by_id(self, attribute_id: str, data: str) -> dict:
         """Given the Attribute's ID, this will update the Attribute's information.
 
@@ -53,6 +65,7 @@ class PyTriliumAttributeClient(PyTriliumClient):
         """
         return self.make_request(f"/attributes/{attribute_id}", method="PATCH", data=data).json()
 
+    @traced
     def delete_attribute_by_id(self, attribute_id: str) -> dict:
         """Given the Attribute's ID, this will delete the Attribute.
 
@@ -67,3 +80,233 @@ class PyTriliumAttributeClient(PyTriliumClient):
             The JSON response from Trilium, as a dictionary.
         """
         return self.make_request(f"/attributes/{attribute_id}", method="DELETE").json()
+
+    def get_attribute_ids(self, name: str, type: str = "label") -> dict:
+        """Look up the IDs of the attributes with the given name, on the notes that the bulk helpers have already seen.
+
+        Parameters
+        ----------
+        name : str
+            The name of the attribute.
+        type : str, optional
+            The type of the attribute, either "label" or "relation", by default "label"
+
+        Returns
+        -------
+        dict
+            The IDs of the matching attributes, keyed by the ID of the note they belong to.
+        """
+        return {
+            note_id: [attribute["attributeId"] for attribute in attributes]
+            for note_id, attributes in self.attribute_index.get((type, name), {}).items()
+            if attributes
+        }
+
+    @traced
+    def index_note_attributes(self, note_ids: list, refresh: bool = False, max_workers: int = None) -> dict:
+        """Fetch the attributes of the given notes into `attribute_index`. Notes that are already indexed are skipped.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes whose attributes should be indexed.
+        refresh : bool, optional
+            If True, the notes are fetched again even if they're already indexed, by default False
+        max_workers : int, optional
+            How many notes to fetch at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            The notes whose attributes couldn't be fetched, as {noteId: error}. These notes aren't indexed.
+        """
+
+        def fetch(note_id: str) -> dict:
+            resp = self.make_request(f"/notes/{note_id}")
+            if resp.status_code not in self.valid_response_codes:
+                raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+            note = resp.json()
+            if "attributes" not in note:
+                raise ValueError(f"The response for note {note_id} has no attributes: {note}")
+            return note
+
+        to_fetch = [note_id for note_id in note_ids if refresh or note_id not in self.indexed_note_ids]
+        notes = self.map_concurrently(fetch, to_fetch, max_workers)
+
+        failed = {}
+        for note_id, note in zip(to_fetch, notes):
+            if isinstance(note, Exception):
+                self.logger.warning(f"Could not fetch the attributes of note {note_id}: {note}")
+                failed[note_id] = note
+                # What was indexed before may be out of date
+                self.indexed_note_ids.discard(note_id)
+                continue
+            for by_note in self.attribute_index.values():
+                by_note.pop(note_id, None)
+            for attribute in note["attributes"]:
+                # The note's inherited attributes belong to other notes
+                if attribute.get("noteId", note_id) == note_id:
+                    self._index_attribute(attribute)
+            self.indexed_note_ids.add(note_id)
+        return failed
+
+    @traced
+    def set_labels(self, note_ids: list, name: str, value: str = "", max_workers: int = None) -> dict:
+        """Make sure that every given note has a label with the given name and value. A note that has the label with a
+        different value gets its label updated, and a note without the label gets one created.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to label.
+        name : str
+            The name of the label.
+        value : str, optional
+            The value of the label, by default ""
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many labels were created, updated, deleted, or already correct, along with the notes that failed, e.g.
+            `{"created": 10, "updated": 2, "deleted": 0, "unchanged": 5, "failed": {noteId: error}}`. A note whose
+            attributes couldn't be fetched is left alone, and listed in "failed".
+        """
+        failed = self.index_note_attributes(note_ids, max_workers=max_workers)
+
+        changes = []
+        unchanged = 0
+        for note_id in note_ids:
+            if note_id in failed:
+                continue
+            labels = self.attribute_index.get(("label", name), {}).get(note_id, [])
+            if any(label.get("value") == value for label in labels):
+                unchanged += 1
+            elif labels:
+                changes.append(("updated", note_id, labels[0], {"value": value}))
+            else:
+                changes.append(
+                    ("created", note_id, None, {"noteId": note_id, "type": "label", "name": name, "value": value})
+                )
+        return self._apply_attribute_changes(changes, unchanged, failed, max_workers)
+
+    @traced
+    def remove_labels(self, note_ids: list, name: str, value: str = None, max_workers: int = None) -> dict:
+        """Delete the labels with the given name from every given note.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to remove the label from.
+        name : str
+            The name of the label.
+        value : str, optional
+            Only delete the labels with this value, by default None (delete the labels with any value)
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many labels were created, updated, deleted, or already correct, along with the notes that failed.
+        """
+        failed = self.index_note_attributes(note_ids, max_workers=max_workers)
+
+        changes = []
+        unchanged = 0
+        for note_id in note_ids:
+            if note_id in failed:
+                continue
+            labels = [
+                label
+                for label in self.attribute_index.get(("label", name), {}).get(note_id, [])
+                if value is None or label.get("value") == value
+            ]
+            if not labels:
+                unchanged += 1
+            changes.extend(("deleted", note_id, label, None) for label in labels)
+        return self._apply_attribute_changes(changes, unchanged, failed, max_workers)
+
+    @traced
+    def add_relations(self, note_ids: list, name: str, target_note_id: str, max_workers: int = None) -> dict:
+        """Make sure that every given note has a relation with the given name, pointing to the target note.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to add the relation to.
+        name : str
+            The name of the relation.
+        target_note_id : str
+            The ID of the note that the relation points to.
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many relations were created, or already existed, along with the notes that failed.
+        """
+        failed = self.index_note_attributes(note_ids, max_workers=max_workers)
+
+        changes = []
+        unchanged = 0
+        for note_id in note_ids:
+            if note_id in failed:
+                continue
+            relations = self.attribute_index.get(("relation", name), {}).get(note_id, [])
+            if any(relation.get("value") == target_note_id for relation in relations):
+                unchanged += 1
+            else:
+                changes.append(
+                    (
+                        "created",
+                        note_id,
+                        None,
+                        {"noteId": note_id, "type": "relation", "name": name, "value": target_note_id},
+                    )
+                )
+        return self._apply_attribute_changes(changes, unchanged, failed, max_workers)
+
+    def _index_attribute(self, attribute: dict) -> None:
+        key = (attribute["type"], attribute["name"])
+        self.attribute_index.setdefault(key, {}).setdefault(attribute["noteId"], []).append(attribute)
+
+    def _unindex_attribute(self, attribute: dict) -> None:
+        attributes = self.attribute_index.get((attribute["type"], attribute["name"]), {}).get(attribute["noteId"], [])
+        if attribute in attributes:
+            attributes.remove(attribute)
+
+    def _apply_attribute_changes(self, changes: list, unchanged: int, failed: dict, max_workers: int = None) -> dict:
+        def apply(change):
+            action, note_id, attribute, data = change
+            if action == "created":
+                resp = self.make_request("/attributes", method="POST", data=json.dumps(data))
+            elif action == "updated":
+                resp = self.make_request(
+                    f"/attributes/{attribute['attributeId']}", method="PATCH", data=json.dumps(data)
+                )
+            else:
+                resp = self.make_request(f"/attributes/{attribute['attributeId']}", method="DELETE")
+            if resp.status_code not in self.valid_response_codes:
+                raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+            return resp.json() if resp.content else None
+
+        summary = {"created": 0, "updated": 0, "deleted": 0, "unchanged": unchanged, "failed": dict(failed)}
+        for change, result in zip(changes, self.map_concurrently(apply, changes, max_workers)):
+            action, note_id, attribute, data = change
+            if isinstance(result, Exception):
+                summary["failed"][note_id] = result
+                continue
+
+            # Keep the index in line with what is now in Trilium
+            if action == "created":
+                self._index_attribute(result)
+            elif action == "updated":
+                self._unindex_attribute(attribute)
+                self._index_attribute(result or {**attribute, **data})
+            else:
+                self._unindex_attribute(attribute)
+            summary[action] += 1
+        return summary
@@ -1,11 +1,15 @@
+import json
+
 import requests
 from .PyTriliumClient import PyTriliumClient
+from .PyTriliumTracing import traced
 
 
 class PyTriliumBranchClient(PyTriliumClient):
     def __init__(self, url, token, debug=False) -> None:
         super().__init__(url, token, debug)
 
+    @traced
     def get_branch_by_id(self, branch_id: str) -> dict:
         """Given the Branch's ID, this will return the Branch's information.
 
@@ -21,6 +25,7 @@ class PyTriliumBranchClient(PyTriliumClient):
         """
         return self.make_request(f"/branches/{branch_id}").json()
 
+    @traced
     def post_branch(self, data: str) -> dict:
         """This will create a new Branch.
 
@@ -36,6 +41,7 @@ class PyTriliumBranchClient(PyTriliumClient):
         """
         return self.make_request("/branches", method="POST", data=data)
 
+    @traced
     def patch_branch_by_id(self, branch_id: str, data: str) -> dict:
         """Given the Branch's ID, this will update the Branch's information.
 
@@ -53,6 +59,7 @@ class PyTriliumBranchClient(PyTriliumClient):
         """
         return self.make_request(f"/branches/{branch_id}", method="PATCH", data=data)
 
+    @traced
     def delete_branch_by_id(self, branch_id: str) -> dict:
         """Given the Branch's ID, this will delete the Branch.
 
@@ -67,3 +74,188 @@ class PyTriliumBranchClient(PyTriliumClient):
             The JSON response from Trilium, as a dictionary.
         """
         return self.make_request(f"/branches/{branch_id}", method="DELETE")
+
+    @traced
+    def move_notes(
+        self, note_ids: list, new_parent_id: str, old_parent_id: str = None, prefix: str = None, max_workers: int = None
+    ) -> dict:
+        """Move every given note under a new parent. Each note gets a branch under the new parent (unless it already has
+        one), and then loses its branches under its other parents. The note ordering of every parent that was changed is
+        refreshed once, at the end.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to move.
+        new_parent_id : str
+            The ID of the note to move them under.
+        old_parent_id : str, optional
+            Only move the notes away from this parent, keeping their other clones, by default None (remove every other
+            branch of the notes)
+        prefix : str, optional
+            The prefix of the new branches, by default None
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many branches were created, updated, deleted, or already correct, along with the notes that failed, e.g.
+            `{"created": 10, "updated": 0, "deleted": 10, "unchanged": 2, "failed": {noteId: error}}`.
+        """
+        notes = self._get_notes(note_ids, max_workers)
+
+        changes = {}
+        unchanged = 0
+        failed = {}
+        for note_id, note in zip(note_ids, notes):
+            if isinstance(note, Exception):
+                failed[note_id] = note
+                continue
+            note_changes = []
+            if new_parent_id not in note.get("parentNoteIds", []):
+                note_changes.append(("created", new_parent_id, self._new_branch(note_id, new_parent_id, prefix)))
+            for parent_id, branch_id in zip(note.get("parentNoteIds", []), note.get("parentBranchIds", [])):
+                if parent_id != new_parent_id and old_parent_id in (None, parent_id):
+                    note_changes.append(("deleted", parent_id, branch_id))
+            if note_changes:
+                changes[note_id] = note_changes
+            else:
+                unchanged += 1
+        return self._apply_branch_changes(changes, unchanged, failed, max_workers)
+
+    @traced
+    def clone_notes(self, note_ids: list, parent_id: str, prefix: str = None, max_workers: int = None) -> dict:
+        """Clone every given note under a parent, i.e. give each note a branch under the parent, while keeping its other
+        branches. The parent's note ordering is refreshed once, at the end.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to clone.
+        parent_id : str
+            The ID of the note to clone them under.
+        prefix : str, optional
+            The prefix of the new branches, by default None
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many branches were created, or already existed, along with the notes that failed.
+        """
+        notes = self._get_notes(note_ids, max_workers)
+
+        changes = {}
+        unchanged = 0
+        failed = {}
+        for note_id, note in zip(note_ids, notes):
+            if isinstance(note, Exception):
+                failed[note_id] = note
+            elif parent_id in note.get("parentNoteIds", []):
+                unchanged += 1
+            else:
+                changes[note_id] = [("created", parent_id, self._new_branch(note_id, parent_id, prefix))]
+        return self._apply_branch_changes(changes, unchanged, failed, max_workers)
+
+    @traced
+    def reorder_children(self, parent_id: str, key=None, reverse: bool = False, max_workers: int = None) -> dict:
+        """Sort the children of a note. Only the branches whose position changes are updated, and the parent's note
+        ordering is refreshed once, at the end.
+
+        Parameters
+        ----------
+        parent_id : str
+            The ID of the note whose children to sort.
+        key : callable, optional
+            Given a child note (as a dictionary), returns what to sort it by, by default None (sorts by title, ignoring case)
+        reverse : bool, optional
+            If the children should be sorted in descending order, by default False
+        max_workers : int, optional
+            How many requests to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        dict
+            How many branches were updated, or already in the right position, along with the notes that failed.
+        """
+        parent = self._get_notes([parent_id], max_workers)[0]
+        if isinstance(parent, Exception):
+            raise parent
+        branch_ids = parent.get("childBranchIds", [])
+        branches = self.map_concurrently(lambda branch_id: self.get_branch_by_id(branch_id), branch_ids, max_workers)
+        for branch in branches:
+            if isinstance(branch, Exception):
+                raise branch
+        notes = self._get_notes([branch["noteId"] for branch in branches], max_workers)
+        for note in notes:
+            if isinstance(note, Exception):
+                raise note
+
+        key = key or (lambda note: note.get("title", "").casefold())
+        ordered = sorted(zip(branches, notes), key=lambda pair: key(pair[1]), reverse=reverse)
+
+        changes = {}
+        unchanged = 0
+        for position, (branch, note) in enumerate(ordered, start=1):
+            if branch.get("notePosition") == position * 10:
+                unchanged += 1
+            else:
+                changes[note["noteId"]] = [
+                    ("updated", parent_id, (branch["branchId"], {"notePosition": position * 10}))
+                ]
+        return self._apply_branch_changes(changes, unchanged, {}, max_workers)
+
+    def _get_notes(self, note_ids: list, max_workers: int = None) -> list:
+        def get_note(note_id):
+            resp = self.make_request(f"/notes/{note_id}")
+            if resp.status_code not in self.valid_response_codes:
+                raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+            return resp.json()
+
+        return self.map_concurrently(get_note, note_ids, max_workers)
+
+    def _new_branch(self, note_id: str, parent_id: str, prefix: str = None) -> dict:
+        branch = {"noteId": note_id, "parentNoteId": parent_id}
+        if prefix is not None:
+            branch["prefix"] = prefix
+        return branch
+
+    def _apply_branch_changes(self, changes: dict, unchanged: int, failed: dict, max_workers: int = None) -> dict:
+        def apply(note_id):
+            # A note's changes are made in order, so that it gets its new branch before losing its last old one (which
+            # would delete the note)
+            for action, parent_id, data in changes[note_id]:
+                if action == "created":
+                    resp = self.make_request("/branches", method="POST", data=json.dumps(data))
+                elif action == "updated":
+                    branch_id, patch = data
+                    resp = self.make_request(f"/branches/{branch_id}", method="PATCH", data=json.dumps(patch))
+                else:
+                    resp = self.make_request(f"/branches/{data}", method="DELETE")
+                if resp.status_code not in self.valid_response_codes:
+                    raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+
+        summary = {"created": 0, "updated": 0, "deleted": 0, "unchanged": unchanged, "failed": dict(failed)}
+        changed_parents = set()
+        note_ids = list(changes)
+        for note_id, result in zip(note_ids, self.map_concurrently(apply, note_ids, max_workers)):
+            # Even a note that failed part way may have changed its parents
+            changed_parents.update(parent_id for _, parent_id, _ in changes[note_id])
+            if isinstance(result, Exception):
+                summary["failed"][note_id] = result
+                continue
+            for action, _, _ in changes[note_id]:
+                summary[action] += 1
+
+        def refresh(parent_id):
+            resp = self.make_request(f"/refresh-note-ordering/{parent_id}", method="POST")
+            if resp.status_code not in self.valid_response_codes:
+                raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+
+        parent_ids = sorted(changed_parents)
+        for parent_id, result in zip(parent_ids, self.map_concurrently(refresh, parent_ids, max_workers)):
+            if isinstance(result, Exception):
+                self.logger.warning(f"Refreshing the note ordering of {parent_id} failed: {result}")
+        return summary
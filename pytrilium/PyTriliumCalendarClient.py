@@ -1,11 +1,13 @@
 import requests
 from .PyTriliumClient import PyTriliumClient
+from .PyTriliumTracing import traced
 
 
 class PyTriliumCalendarClient(PyTriliumClient):
     def __init__(self, url, token, debug=False) -> None:
         super().__init__(url, token, debug)
 
+    @traced
     def get_year_note(self, year: str) -> dict:
         """Get the note for a year, in Trilium's calendar.
 
@@ -21,6 +23,7 @@ class PyTriliumCalendarClient(PyTriliumClient):
         """
         return self.make_request(f"/calendar/years/{year}").json()
 
+    @traced
     def get_weeks_note(self, weeks: str) -> dict:
         """Get the note for a week, in Trilium's calendar.
 
@@ -36,6 +39,7 @@ class PyTriliumCalendarClient(PyTriliumClient):
         """
         return self.make_request(f"/calendar/weeks/{weeks}").json()
 
+    @traced
     def get_months_note(self, months: str) -> dict:
         """Get the note for a month, in Trilium's calendar.
 
@@ -51,6 +55,7 @@ class PyTriliumCalendarClient(PyTriliumClient):
         """
         return self.make_request(f"/calendar/months/{months}").json()
 
+    @traced
     def get_days_note(self, date: str) -> dict:
         """Get the note for a day, in Trilium's calendar.
 
@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a request, while the circuit breaker considers Trilium to be unhealthy."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """Initializes the CircuitBreaker class, which stops requests from being made after too many of them failed in a
+        row, so that callers fail fast instead of piling up on a server that is struggling.
+
+        After `reset_timeout` seconds, a single trial request is let through. If it succeeds the breaker closes again, and
+        if it fails the breaker stays open for another `reset_timeout` seconds.
+
+        Parameters
+        ----------
+        failure_threshold : int, optional
+            How many requests in a row have to fail before the breaker opens, by default 5
+        reset_timeout : float, optional
+            How many seconds the breaker stays open before a trial request is let through, by default 30.0
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.lock = threading.Lock()
+        # One of "closed" (requests are made), "open" (requests fail fast) or "half-open" (a trial request is running)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def before_request(self) -> None:
+        """Checks if a request may be made.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the breaker is open, or a trial request is already running.
+        """
+        with self.lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                return
+            raise CircuitOpenError(
+                f"Not making the request, since the last {self.failures} requests to Trilium failed. "
+                f"Trying again {self.reset_timeout} seconds after the last failure."
+            )
+
+    def record_success(self) -> None:
+        """Records that a request succeeded, which closes the breaker."""
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        """Records that a request failed, which opens the breaker when there have been too many failures in a row."""
+        with self.lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
@@ -1,9 +1,64 @@
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
 import requests
 from requests.adapters import HTTPAdapter, Retry
+from urllib3.exceptions import ReadTimeoutError
 
 # Local imports
 from . import log
 from . import __version__
+from .PyTriliumCircuitBreaker import CircuitBreaker
+from .PyTriliumDiskCache import DiskCache
+from .PyTriliumHedging import RequestHedger
+from .PyTriliumScheduler import CURRENT_LANE, RequestScheduler
+from .PyTriliumSingleFlight import SingleFlight
+from .PyTriliumTracing import REQUEST_SPAN, PyTriliumTracer, TracingRetry, get_otel_tracer, traced
+from .PyTriliumTransport import REQUEST_DEADLINE, DeadlineExceededError, PyTriliumTransport, RequestsTransport
+
+# Matches the `Content-Range` header of a partial response, e.g. `bytes 100-199/1000`
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class RangesNotSupportedError(ValueError):
+    """Raised when the server answered a request for part of a file with the whole file."""
+
+
+class DeadlineRetry(TracingRetry):
+    """`TracingRetry`, which also keeps the retries of a request with a timeout within that timeout. A read timeout isn't
+    retried, since it already used up the request's time, and the backoff between retries never goes past the deadline.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        deadline = REQUEST_DEADLINE.get()
+        if deadline is not None and (isinstance(error, ReadTimeoutError) or time.monotonic() >= deadline):
+            # Out of time, so give up with the error itself (e.g. a `requests.ReadTimeout`), or the same way as when
+            # there are no retries left
+            if error is not None:
+                raise error
+            return Retry.increment(self.new(total=0), method, url, response, error, _pool, _stacktrace)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        deadline = REQUEST_DEADLINE.get()
+        if deadline is not None:
+            backoff = min(backoff, max(deadline - time.monotonic(), 0))
+        return backoff
+
+
+# Matches the IDs in an endpoint, so that e.g. `/notes/MLDQ3EGWsU8e/content` becomes `/notes/{id}/content`
+ENDPOINT_ID_PATTERN = re.compile(
+    r"/(notes|attributes|branches|attachments|refresh-note-ordering|backup|inbox|days|weeks|months|years)/[^/?]+"
+)
 
 
 class PyTriliumClient:
@@ -41,22 +96,72 @@ class PyTriliumClient:
 
         # The valid response codes that can come from Triliu
         # everything else will be logged as a console warning
-        self.valid_response_codes = [200, 201, 202, 204]
+        self.valid_response_codes = [200, 201, 202, 204, 206]
+
+        # How many requests the bulk helpers make at the same time, by default
+        self.max_workers = 8
+
+        # If request bodies of at least `compress_min_size` bytes should be gzipped, see `make_request`
+        self.compress_request_bodies = False
+        self.compress_min_size = 1024
+
+        # If identical GET requests that are made at the same time should share a single request, see `make_request`.
+        # `single_flight.stats` counts how many requests were coalesced.
+        self.coalesce_requests = False
+        self.single_flight = SingleFlight()
+
+        # How many seconds a request may take (including its retries, a hedged second request and reading the body), either
+        # for every request or per endpoint template
+        # (e.g. `/notes/{id}/content`, see `get_endpoint_template`). None waits forever.
+        self.default_timeout = None
+        self.endpoint_timeouts = {}
+
+        # Set with `enable_hedging` and `enable_circuit_breaker`
+        self.hedger = None
+        self.circuit_breaker = None
+
+        # Set with `enable_disk_cache`
+        self.disk_cache = None
+
+        # Set with `enable_scheduler`
+        self.scheduler = None
+
+        # Records nothing until `enable_tracing` is called
+        self.tracer = PyTriliumTracer()
+
+    def make_requests_session(self, pool_maxsize: int = 10) -> None:
+        """Creates a requests session with the token and user agent header.
 
-    def make_requests_session(self) -> None:
-        """Creates a requests session with the token and user agent header."""
+        Parameters
+        ----------
+        pool_maxsize : int, optional
+            The maximum number of connections to keep open to Trilium, by default 10
+        """
         self.session = requests.Session()
 
         # Set User-Agent with dynamic version
         self.session.headers.update({"User-Agent": f"pytrilium/{__version__}"})
         # self.session.headers.update({"Content-Type": "application/json"})
 
-        # Set up retry logic
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504])
+        # Set up retry logic, which other transports can use as well
+        self.retries = DeadlineRetry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504])
 
         # Have it work for both http and https
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
-        self.session.mount("http://", HTTPAdapter(max_retries=retries))
+        self.session.mount("https://", HTTPAdapter(max_retries=self.retries, pool_maxsize=pool_maxsize))
+        self.session.mount("http://", HTTPAdapter(max_retries=self.retries, pool_maxsize=pool_maxsize))
+
+        # By default, requests are sent through this session
+        self.transport = RequestsTransport(self.session)
+
+    def set_transport(self, transport: PyTriliumTransport) -> None:
+        """Sets the transport that requests are sent through, e.g. `HTTPXTransport` for HTTP/2.
+
+        Parameters
+        ----------
+        transport : PyTriliumTransport
+            The transport to send requests through.
+        """
+        self.transport = transport
 
     def set_session_auth(self, token: str) -> None:
         """Sets the authorization token for the session.
@@ -68,7 +173,141 @@ class PyTriliumClient:
         """
         self.session.headers.update({"Authorization": token})
 
-    def make_request(self, api_endpoint: str, method="GET", data="", params={}) -> requests.Response:
+    def enable_hedging(self, percentile: float = 95, min_delay: float = 0.05, min_samples: int = 20) -> None:
+        """Hedge GET requests: when one takes longer than most requests to the same endpoint do, an identical request is
+        sent and whichever responds first is used. `hedger.stats` counts how often this happened.
+
+        Parameters
+        ----------
+        percentile : float, optional
+            The percentile of recent response times after which the second request is sent, by default 95
+        min_delay : float, optional
+            The least amount of seconds to wait before sending the second request, by default 0.05
+        min_samples : int, optional
+            How many response times have to be known for an endpoint before its requests are hedged, by default 20
+        """
+        self.hedger = RequestHedger(
+            percentile=percentile, min_delay=min_delay, min_samples=min_samples, max_workers=self.max_workers * 2
+        )
+
+    def enable_circuit_breaker(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """Stop making requests after too many failed in a row, raising `CircuitOpenError` right away instead, until a trial
+        request succeeds again. A request fails when it raises an exception (e.g. it timed out) or gets a 5xx response.
+
+        Parameters
+        ----------
+        failure_threshold : int, optional
+            How many requests in a row have to fail before requests stop being made, by default 5
+        reset_timeout : float, optional
+            How many seconds to wait before a trial request is let through, by default 30.0
+        """
+        self.circuit_breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+    def enable_disk_cache(self, path: str, max_size: int = 1024 * 1024 * 1024) -> DiskCache:
+        """Cache large response bodies, such as note and attachment contents, on disk. Every process that points at the same
+        directory shares the cache, so a newly started process can use what the others already fetched. The `..._view_by_id`
+        methods (and `get_content_view`) read cached bodies without copying them into memory, the other methods read the
+        cached body into memory.
+
+        Parameters
+        ----------
+        path : str
+            The directory to keep the cache in.
+        max_size : int, optional
+            The maximum number of bytes the cache may take up, by default 1 GiB
+
+        Returns
+        -------
+        DiskCache
+            The cache, which is also stored on the client as `disk_cache`.
+        """
+        self.disk_cache = DiskCache(path, max_size=max_size)
+        return self.disk_cache
+
+    def enable_scheduler(
+        self, max_concurrent: int = 10, lanes: dict = None, default_lane: str = None
+    ) -> RequestScheduler:
+        """Limit how many requests are sent at the same time, and share the slots between lanes of requests, so that e.g.
+        a bulk job can't keep interactive requests waiting. Requests go in the `default_lane`, unless another lane is
+        given to `make_request` or selected with `priority`. `scheduler.get_stats()` shows how long each lane waited.
+
+        Parameters
+        ----------
+        max_concurrent : int, optional
+            How many requests may be sent at the same time, keep this at or below the connection pool size, by default 10
+        lanes : dict, optional
+            The lanes, as {name: {"weight": ..., "max_concurrent": ...}}, see `RequestScheduler`. By default an
+            "interactive" lane, and a "bulk" lane that gets an eighth of the interactive lane's share and may use up to half
+            of the slots.
+        default_lane : str, optional
+            The lane of the requests that aren't given one, by default None ("interactive" if there is such a lane,
+            otherwise the first lane)
+
+        Returns
+        -------
+        RequestScheduler
+            The scheduler, which is also stored on the client as `scheduler`.
+        """
+        self.scheduler = RequestScheduler(max_concurrent=max_concurrent, lanes=lanes, default_lane=default_lane)
+        return self.scheduler
+
+    @contextmanager
+    def priority(self, lane: str):
+        """Schedule the requests made inside of this context manager in a lane, e.g. `with client.priority("bulk"):`. This
+        also applies to the requests that the bulk helpers make from their threads.
+
+        Parameters
+        ----------
+        lane : str
+            The name of the lane, e.g. "interactive" or "bulk".
+        """
+        token = CURRENT_LANE.set(lane)
+        try:
+            yield
+        finally:
+            CURRENT_LANE.reset(token)
+
+    def enable_tracing(self, tracer=None) -> None:
+        """Record OpenTelemetry spans for the client's methods, with a child span for every HTTP request that they make and
+        for decoding its JSON. Retries that happen inside of a request are recorded as events on its span. Requires the
+        `tracing` extra, i.e. `pip install pytrilium[tracing]`.
+
+        Parameters
+        ----------
+        tracer : opentelemetry.trace.Tracer, optional
+            The tracer to record the spans with, by default None (gets one from the global tracer provider)
+        """
+        self.tracer = PyTriliumTracer(tracer or get_otel_tracer())
+
+    def get_endpoint_template(self, api_endpoint: str) -> str:
+        """Replaces the IDs in an API endpoint with a placeholder, so that requests to the same kind of endpoint can be
+        grouped together.
+
+        Parameters
+        ----------
+        api_endpoint : str
+            The API endpoint, e.g. `/notes/MLDQ3EGWsU8e/content?format=html`
+
+        Returns
+        -------
+        str
+            The endpoint's template, e.g. `/notes/{id}/content`
+        """
+        return ENDPOINT_ID_PATTERN.sub(r"/\1/{id}", api_endpoint.split("?")[0])
+
+    def make_request(
+        self,
+        api_endpoint: str,
+        method="GET",
+        data="",
+        params={},
+        headers: dict = None,
+        compress: bool = None,
+        timeout: float = None,
+        cache_validator: str = None,
+        stream: bool = False,
+        priority: str = None,
+    ) -> requests.Response:
         """Standard request method for making requests to the Trilium API.
 
         Parameters
@@ -81,6 +320,27 @@ class PyTriliumClient:
             The body data to send with the request, by default ""
         params : dict, optional
             The parameters to include in the API call, by default {}
+        headers : dict, optional
+            Extra headers to send with this request, by default None
+        compress : bool, optional
+            If the body should be gzipped, when it is at least `compress_min_size` bytes. By default None, which uses
+            `compress_request_bodies`
+        timeout : float, optional
+            How many seconds the request may take, including waiting for a slot, its retries, a hedged second request and
+            reading its body, after which `DeadlineExceededError` (or another `requests.Timeout`) is raised. A streamed
+            request only has until its headers are in. By default None, which uses the timeout for the endpoint's template
+            from `endpoint_timeouts`, or `default_timeout`
+        cache_validator : str, optional
+            Something that changes whenever the response changes, such as the note's `blobId` or `utcDateModified`. When
+            this is given and `enable_disk_cache` was called, a successful GET response is cached on disk under the endpoint
+            and this validator. A cached body is read into memory to build the response, use `get_content_view` to read it
+            without copying, by default None
+        stream : bool, optional
+            If True, the body isn't read yet, so that it can be read in chunks with `transport.iter_content`. Streamed
+            requests are never cached, coalesced or hedged, by default False
+        priority : str, optional
+            The lane to schedule the request in when `enable_scheduler` was called, e.g. "bulk". By default None, which uses
+            the lane selected with `priority`, or the scheduler's `default_lane`
 
         Returns
         -------
@@ -90,14 +350,424 @@ class PyTriliumClient:
         # We use our own session that holds the token, so we shouldn't
         # need to enforce it here.
 
+        if compress is None:
+            compress = self.compress_request_bodies
+        if compress and data and len(data) >= self.compress_min_size:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            data = gzip.compress(data)
+            headers = {**(headers or {}), "Content-Encoding": "gzip"}
+
         request_url = self.url + api_endpoint
-        req_resp = self.session.request(method, request_url, data=data, params=params)
+        endpoint_template = self.get_endpoint_template(api_endpoint)
+        if timeout is None:
+            timeout = self.endpoint_timeouts.get(endpoint_template, self.default_timeout)
+        # The same deadline covers waiting for a slot, the retries and a hedged second request
+        deadline = time.monotonic() + timeout if timeout else None
+        lane = priority or CURRENT_LANE.get()
+
+        def attempt() -> requests.Response:
+            span_attributes = {
+                "http.request.method": method,
+                "url.template": endpoint_template,
+                "http.request.body.size": len(data or ""),
+            }
+            with self.tracer.span(f"HTTP {method}", span_attributes) as span, self._scheduler_slot(lane) as queue_time:
+                if queue_time is not None:
+                    span.set_attribute("pytrilium.queue_time", queue_time)
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceededError(f"The request wasn't sent within the timeout of {timeout} seconds")
+                breaker = self.circuit_breaker
+                if breaker is not None:
+                    breaker.before_request()
+                request_span = REQUEST_SPAN.set(span)
+                try:
+                    resp = self.transport.request(
+                        method, request_url, data=data, params=params, headers=headers, timeout=remaining, stream=stream
+                    )
+                except Exception:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+                finally:
+                    REQUEST_SPAN.reset(request_span)
+                if breaker is not None:
+                    if resp.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+
+                span.set_attribute("http.response.status_code", resp.status_code)
+                # Don't read the body of a streamed response, that's up to the caller
+                span.set_attribute(
+                    "http.response.body.size",
+                    int(resp.headers.get("Content-Length", 0)) if stream else len(resp.content),
+                )
+                return resp
+
+        def send() -> requests.Response:
+            # Only GET requests are safe to send twice
+            if self.hedger is not None and method == "GET" and not stream:
+                return self.hedger.call(endpoint_template, attempt)
+            return attempt()
+
+        cache_key = None
+        if self.disk_cache is not None and cache_validator and method == "GET" and not stream:
+            cache_key = self._cache_key(api_endpoint, params, cache_validator)
+            cached = self.disk_cache.get(cache_key)
+            if cached is not None:
+                req_resp = self._make_cached_response(request_url, *cached)
+                if self.tracer.enabled:
+                    self._trace_decoding(req_resp, endpoint_template)
+                return req_resp
+
+        if self.coalesce_requests and method == "GET" and not stream:
+            # Threads asking for the same thing at the same time get the same response. The JSON is still decoded by each
+            # caller, so that they don't end up sharing (and mutating) the same dictionary.
+            key = (api_endpoint, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+            req_resp = self.single_flight.do(key, send)
+        else:
+            req_resp = send()
         if req_resp.status_code not in self.valid_response_codes:
+            # Reading the text of a streamed response would use up its body
+            response_text = "(streamed)" if stream else req_resp.text
             self.logger.warning(
-                f"Possible invalid response code: {str(req_resp.status_code)}, response text: {req_resp.text}"
+                f"Possible invalid response code: {str(req_resp.status_code)}, response text: {response_text}"
             )
+        elif cache_key is not None and req_resp.status_code == 200:
+            self.disk_cache.put(cache_key, req_resp.content, req_resp.headers.get("Content-Type"))
+        if self.tracer.enabled:
+            self._trace_decoding(req_resp, endpoint_template)
         return req_resp
 
+    def _scheduler_slot(self, lane: str):
+        # A streamed response gives its slot back once its headers are in, and not when its body has been read
+        if self.scheduler is None:
+            return nullcontext(None)
+        return self.scheduler.slot(lane or self.scheduler.default_lane)
+
+    def _trace_decoding(self, resp: requests.Response, endpoint_template: str) -> None:
+        # Decoding happens when the caller calls .json(), so wrap it to record the time it takes in its own span
+        decode = resp.json
+        if getattr(decode, "traced", False):
+            return
+
+        def json(**kwargs):
+            with self.tracer.span("pytrilium.decode_json", {"url.template": endpoint_template}):
+                return decode(**kwargs)
+
+        json.traced = True
+        resp.json = json
+
+    def get_content_view(self, api_endpoint: str, cache_validator: str, params: dict = None) -> memoryview:
+        """Get a response body as a read-only view, without copying it into memory when it can be read from the disk
+        cache. The cached file is memory-mapped, so even very large contents cost next to no memory. On a cache miss, the
+        body is fetched (and cached) first. Without a disk cache, the view is of the fetched body.
+
+        Parameters
+        ----------
+        api_endpoint : str
+            The API endpoint to get the body of. This should not include the URL or the /etapi prefix.
+        cache_validator : str
+            Something that changes whenever the body does, such as the note's `blobId`.
+        params : dict, optional
+            The parameters to include in the API call, by default None
+
+        Returns
+        -------
+        memoryview
+            A read-only view of the body.
+
+        Raises
+        ------
+        ValueError
+            If Trilium responded with an error.
+        """
+        if self.disk_cache is not None and cache_validator:
+            view = self.disk_cache.get_view(self._cache_key(api_endpoint, params, cache_validator))
+            if view is not None:
+                return view
+
+        resp = self.make_request(api_endpoint, params=params or {}, cache_validator=cache_validator)
+        if resp.status_code not in self.valid_response_codes:
+            raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+        return memoryview(resp.content).toreadonly()
+
+    def _cache_key(self, api_endpoint: str, params: dict, cache_validator: str) -> str:
+        return f"{api_endpoint}?{sorted((params or {}).items())}@{cache_validator}"
+
+    def _make_cached_response(self, request_url: str, body: bytes, content_type: str) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = request_url
+        resp._content = body
+        if content_type:
+            resp.headers["Content-Type"] = content_type
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        return resp
+
+    def download_file(
+        self,
+        api_endpoint: str,
+        filepath: str,
+        params: dict = None,
+        resume: bool = True,
+        segments: int = 1,
+        validator: str = None,
+        expected_size: int = None,
+        expected_sha256: str = None,
+        max_attempts: int = 5,
+        chunk_size: int = 64 * 1024,
+    ) -> int:
+        """Downloads the response of an API endpoint to a file, without holding it in memory. The download is written to
+        `<filepath>.part` first, and when the connection drops it picks up where it left off with an HTTP Range request, both
+        within this call and in a later call for the same file. If the server doesn't support ranges, the download starts
+        over instead.
+
+        A download is only resumed when it is certain that the content hasn't changed in the meantime, i.e. when the server
+        sent an ETag or Last-Modified header, or when a `validator` is given.
+
+        Parameters
+        ----------
+        api_endpoint : str
+            The API endpoint to download. This should not include the URL or the /etapi prefix.
+        filepath : str
+            Where to save the file.
+        params : dict, optional
+            The parameters to include in the API call, by default None
+        resume : bool, optional
+            If a previous, unfinished download of this file should be continued, by default True
+        segments : int, optional
+            How many parts of the file to download at the same time. Only used when the server supports ranges, by default 1
+        validator : str, optional
+            Something that changes whenever the content does, such as an attachment's `blobId`, by default None
+        expected_size : int, optional
+            The size the file should have, by default None (uses the size the server reports, if it does)
+        expected_sha256 : str, optional
+            The SHA-256 hex digest the file should have, by default None
+        max_attempts : int, optional
+            How many times to try each part of the download before giving up, by default 5
+        chunk_size : int, optional
+            How many bytes to read and write at a time, by default 64 KiB
+
+        Returns
+        -------
+        int
+            The size of the downloaded file.
+
+        Raises
+        ------
+        ValueError
+            If the server responded with an error, or the downloaded file doesn't have the expected size or digest.
+        """
+        part_path = f"{filepath}.part"
+        state_path = f"{filepath}.part.json"
+
+        state = {}
+        if resume and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        if state.get("endpoint") != api_endpoint or state.get("validator") != validator:
+            self._remove_partial_download(filepath)
+            state = {"endpoint": api_endpoint, "validator": validator}
+
+        with self.tracer.span("pytrilium.download_file", {"url.template": self.get_endpoint_template(api_endpoint)}):
+            downloaded = False
+            if segments > 1:
+                downloaded = self._download_segments(
+                    api_endpoint, params, filepath, state, segments, chunk_size, max_attempts
+                )
+            if not downloaded:
+                self._download_range(
+                    api_endpoint, params, part_path, state, state_path, 0, None, chunk_size, max_attempts
+                )
+
+            size = os.path.getsize(part_path)
+            expected_size = expected_size if expected_size is not None else state.get("total")
+            if expected_size is not None and size != expected_size:
+                self._remove_partial_download(filepath)
+                raise ValueError(
+                    f"The download of {api_endpoint} is {size} bytes, but should be {expected_size} bytes."
+                )
+            if expected_sha256:
+                digest = hashlib.sha256()
+                with open(part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(chunk_size), b""):
+                        digest.update(chunk)
+                if digest.hexdigest() != expected_sha256.lower():
+                    self._remove_partial_download(filepath)
+                    raise ValueError(f"The download of {api_endpoint} doesn't have the expected SHA-256 digest.")
+
+        os.replace(part_path, filepath)
+        os.remove(state_path)
+        return size
+
+    def _download_range(
+        self, api_endpoint, params, path, state, state_path, start, end, chunk_size, max_attempts
+    ) -> None:
+        # Downloads bytes `start` to `end` (or to the end of the file, if None) into `path`, continuing from however much
+        # of it `path` already holds
+        attempts = 0
+        while True:
+            have = os.path.getsize(path) if os.path.exists(path) else 0
+            if end is not None and start + have > end:
+                return
+
+            # Compressed responses can't be resumed at a byte offset, so ask for the file as is
+            headers = {"Accept-Encoding": "identity"}
+            can_resume = state.get("etag") or state.get("last_modified") or state.get("validator")
+            if end is not None or start + have > 0:
+                if end is None and not can_resume:
+                    # Without a way to tell if the content changed, the only safe option is to start over
+                    have = 0
+                else:
+                    headers["Range"] = f"bytes={start + have}-{'' if end is None else end}"
+                    if state.get("etag") or state.get("last_modified"):
+                        headers["If-Range"] = state.get("etag") or state.get("last_modified")
+
+            try:
+                resp = self.make_request(api_endpoint, params=params or {}, headers=headers, stream=True)
+                try:
+                    content_range = CONTENT_RANGE_PATTERN.match(resp.headers.get("Content-Range", ""))
+                    if resp.status_code == 206 and content_range and int(content_range.group(1)) == start + have:
+                        mode = "ab"
+                        if content_range.group(3) != "*":
+                            state["total"] = int(content_range.group(3))
+                    elif resp.status_code == 200:
+                        if end is not None or start > 0:
+                            raise RangesNotSupportedError(f"The server sent all of {api_endpoint} instead of a part.")
+                        mode = "wb"
+                        have = 0
+                        if "Content-Length" in resp.headers and "Content-Encoding" not in resp.headers:
+                            state["total"] = int(resp.headers["Content-Length"])
+                    else:
+                        raise ValueError(
+                            f"Invalid response code: {str(resp.status_code)} while downloading {api_endpoint}"
+                        )
+
+                    if state_path:
+                        state["etag"] = resp.headers.get("ETag")
+                        state["last_modified"] = resp.headers.get("Last-Modified")
+                        with open(state_path, "w") as f:
+                            json.dump(state, f)
+
+                    with self.tracer.span("pytrilium.write_file", {"file.path": path, "file.offset": have}):
+                        with open(path, mode) as f:
+                            for chunk in self.transport.iter_content(resp, chunk_size):
+                                f.write(chunk)
+                finally:
+                    self.transport.close_response(resp)
+            except ValueError:
+                raise
+            except Exception as e:
+                attempts += 1
+                if attempts >= max_attempts:
+                    raise
+                self.logger.warning(f"Downloading {api_endpoint} failed ({e}), resuming (attempt {attempts + 1})")
+                continue
+
+            if end is None or os.path.getsize(path) >= end - start + 1:
+                return
+
+    def _download_segments(self, api_endpoint, params, filepath, state, segments, chunk_size, max_attempts) -> bool:
+        # Ask for the first byte, to find out if the server supports ranges and how large the file is
+        headers = {"Accept-Encoding": "identity", "Range": "bytes=0-0"}
+        resp = self.make_request(api_endpoint, params=params or {}, headers=headers, stream=True)
+        self.transport.close_response(resp)
+        content_range = CONTENT_RANGE_PATTERN.match(resp.headers.get("Content-Range", ""))
+        if resp.status_code != 206 or not content_range or content_range.group(3) == "*":
+            return False
+
+        total = int(content_range.group(3))
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        unchanged = etag or last_modified or state.get("validator")
+        if not unchanged or (
+            state.get("total"),
+            state.get("segments"),
+            state.get("etag"),
+            state.get("last_modified"),
+        ) != (
+            total,
+            segments,
+            etag,
+            last_modified,
+        ):
+            # The segments of a previous download don't fit this one
+            self._remove_partial_download(filepath)
+        state.update({"total": total, "segments": segments, "etag": etag, "last_modified": last_modified})
+        with open(f"{filepath}.part.json", "w") as f:
+            json.dump(state, f)
+
+        segment_size = -(-total // segments)
+        bounds = [(start, min(start + segment_size, total) - 1) for start in range(0, total, segment_size)]
+
+        def download_segment(index: int) -> None:
+            start, end = bounds[index]
+            self._download_range(
+                api_endpoint, params, f"{filepath}.part.{index}", state, None, start, end, chunk_size, max_attempts
+            )
+
+        results = self.map_concurrently(download_segment, range(len(bounds)), max_workers=segments)
+        for result in results:
+            if isinstance(result, RangesNotSupportedError):
+                self._remove_partial_download(filepath)
+                return False
+            if isinstance(result, Exception):
+                raise result
+
+        # Stitch the segments together
+        with open(f"{filepath}.part", "wb") as part_file:
+            for index in range(len(bounds)):
+                with open(f"{filepath}.part.{index}", "rb") as segment_file:
+                    shutil.copyfileobj(segment_file, part_file, chunk_size)
+        for index in range(len(bounds)):
+            os.remove(f"{filepath}.part.{index}")
+        return True
+
+    def _remove_partial_download(self, filepath: str) -> None:
+        directory = os.path.dirname(filepath) or "."
+        prefix = f"{os.path.basename(filepath)}.part"
+        for file_name in os.listdir(directory):
+            if file_name.startswith(prefix):
+                os.remove(os.path.join(directory, file_name))
+
+    def map_concurrently(self, func, items: list, max_workers: int = None) -> list:
+        """Calls the function on every item at the same time, using a pool of threads.
+
+        Parameters
+        ----------
+        func : callable
+            The function to call with each item.
+        items : list
+            The items to call the function with.
+        max_workers : int, optional
+            How many calls to make at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        list
+            The result for every item, in the same order as `items`. If the function raised an exception for an item, that
+            exception is returned in place of its result.
+        """
+
+        def call(item):
+            try:
+                return func(item)
+            except Exception as e:
+                return e
+
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.max_workers, len(items))) as executor:
+            # Run each call in a copy of the caller's context, so that e.g. the current tracing span carries over
+            futures = [executor.submit(contextvars.copy_context().run, call, item) for item in items]
+            return [future.result() for future in futures]
+
     def clean_url(self, url: str) -> bool:
         """Cleans the URL to make sure it is valid.
 
@@ -121,6 +791,7 @@ class PyTriliumClient:
 
         return True
 
+    @traced
     def attempt_basic_call(self) -> None:
         """Attempts a basic call to the Trilium API to make sure that the URL and token are valid."""
         resp = self.make_request("/app-info")
@@ -129,6 +800,7 @@ class PyTriliumClient:
                 f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}. Response code should be one of {self.valid_response_codes}. Please check your Trilium, URL, and token."
             )
 
+    @traced
     def get_app_info(self) -> dict:
         """Gets the app info from the Trilium API.
 
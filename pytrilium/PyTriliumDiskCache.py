@@ -0,0 +1,212 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# How many seconds a body's last access time, which decides what gets evicted, may lag behind. Within that, cache hits
+# don't write anything, and the access times they do need to update are written in one batch.
+ACCESS_TIME_RESOLUTION = 60
+
+
+class DiskCache:
+    def __init__(self, path: str, max_size: int = 1024 * 1024 * 1024) -> None:
+        """Initializes the DiskCache class, a cache of response bodies on disk that any number of processes can share. The
+        bodies are stored as files, and a SQLite database (in WAL mode, so that readers don't block writers) keeps track of
+        them. When the bodies take up more than `max_size` bytes, the least recently used ones are evicted.
+
+        Cache hits only read from the database. How recently a body was used is tracked to the minute, and the updates are
+        written in a batch once a minute, or before bodies are evicted, so that processes don't take turns on SQLite's
+        write lock for every hit.
+
+        Parameters
+        ----------
+        path : str
+            The directory to keep the cache in. It is created if it doesn't exist.
+        max_size : int, optional
+            The maximum number of bytes the cached bodies may take up, by default 1 GiB
+        """
+        self.path = path
+        self.max_size = max_size
+        self.blob_path = os.path.join(path, "blobs")
+        os.makedirs(self.blob_path, exist_ok=True)
+
+        # sqlite3 connections can't be shared between threads, so every thread gets its own
+        self.local = threading.local()
+        # `hits` and `misses` count the lookups made by this process
+        self.stats = {"hits": 0, "misses": 0}
+        # key -> when this process last used it, for the access times that haven't been written yet
+        self.lock = threading.Lock()
+        self.pending_accesses = {}
+        self.accesses_written = time.monotonic()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, file TEXT NOT NULL, size INTEGER NOT NULL, content_type TEXT, last_access REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        connection.commit()
+
+    def get(self, key: str):
+        """Get a cached body.
+
+        Parameters
+        ----------
+        key : str
+            The key the body was cached under.
+
+        Returns
+        -------
+        tuple or None
+            The body as bytes and its content type, or None if nothing is cached under the key.
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        file_name, content_type = entry
+        try:
+            with open(os.path.join(self.blob_path, file_name), "rb") as f:
+                return f.read(), content_type
+        except FileNotFoundError:
+            # Another process evicted it in the meantime
+            return None
+
+    def get_view(self, key: str):
+        """Get a cached body without copying it into memory, by memory-mapping its file. This is the cheapest way to read
+        large bodies, such as attachments.
+
+        Parameters
+        ----------
+        key : str
+            The key the body was cached under.
+
+        Returns
+        -------
+        memoryview or None
+            A read-only view of the body, or None if nothing is cached under the key.
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(self.blob_path, entry[0]), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return memoryview(b"")
+                # The mapping stays valid after the file is closed, or even evicted
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, body: bytes, content_type: str = None) -> None:
+        """Cache a body, evicting the least recently used bodies if the cache is now too large.
+
+        Parameters
+        ----------
+        key : str
+            The key to cache the body under.
+        body : bytes
+            The body to cache.
+        content_type : str, optional
+            The content type of the body, by default None
+        """
+        if len(body) > self.max_size:
+            return
+
+        file_name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        # Write to a temporary file first, so that other processes never read a half written file
+        fd, temp_path = tempfile.mkstemp(dir=self.blob_path)
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, os.path.join(self.blob_path, file_name))
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, file, size, content_type, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, file_name, len(body), content_type, time.time()),
+            )
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove every cached body."""
+        with self.lock:
+            self.pending_accesses = {}
+        connection = self._connection()
+        with connection:
+            files = [row[0] for row in connection.execute("SELECT file FROM entries")]
+            connection.execute("DELETE FROM entries")
+        self._remove_files(files)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.path, "index.sqlite"), timeout=30)
+            self.local.connection = connection
+        return connection
+
+    def _lookup(self, key: str):
+        # A plain SELECT, which doesn't start a transaction
+        row = (
+            self._connection()
+            .execute("SELECT file, content_type, last_access FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        with self.lock:
+            self.stats["hits" if row is not None else "misses"] += 1
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] >= ACCESS_TIME_RESOLUTION:
+                self.pending_accesses[key] = now
+            write_accesses = (
+                self.pending_accesses and time.monotonic() - self.accesses_written >= ACCESS_TIME_RESOLUTION
+            )
+        if write_accesses:
+            self._write_accesses()
+        return row[:2]
+
+    def _write_accesses(self) -> None:
+        with self.lock:
+            accesses, self.pending_accesses = self.pending_accesses, {}
+            self.accesses_written = time.monotonic()
+        if not accesses:
+            return
+        connection = self._connection()
+        with connection:
+            # Another process may have used it more recently
+            connection.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(last_access, key) for key, last_access in accesses.items()],
+            )
+
+    def _evict(self) -> None:
+        # Evict by the latest access times
+        self._write_accesses()
+        connection = self._connection()
+        with connection:
+            total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total_size <= self.max_size:
+                return
+
+            evicted = []
+            for key, file_name, size in connection.execute(
+                "SELECT key, file, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total_size <= self.max_size:
+                    break
+                evicted.append((key, file_name))
+                total_size -= size
+            connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+        self._remove_files([file_name for _, file_name in evicted])
+
+    def _remove_files(self, files: list) -> None:
+        for file_name in files:
+            try:
+                os.remove(os.path.join(self.blob_path, file_name))
+            except OSError:
+                # Already removed by another process, or still mapped on Windows
+                pass
@@ -0,0 +1,176 @@
+import json
+import posixpath
+import zipfile
+
+# The file in every Trilium export that describes the exported notes
+META_FILE_NAME = "!!!meta.json"
+
+
+class ExportArchive:
+    def __init__(self, path: str) -> None:
+        """Initializes the ExportArchive class, which reads a .zip archive made by `export_note_by_id` without extracting
+        it. Only the archive's table of contents and `!!!meta.json` are read up front, and the contents of notes and
+        attachments are streamed from the archive when they're asked for.
+
+        Use it as a context manager, or `close` it when you're done.
+
+        Parameters
+        ----------
+        path : str
+            The path of the .zip archive.
+
+        Raises
+        ------
+        ValueError
+            If the archive doesn't have a `!!!meta.json`, e.g. because it was exported as markdown without metadata.
+        """
+        self.path = path
+        self.zip_file = zipfile.ZipFile(path)
+        try:
+            with self.zip_file.open(META_FILE_NAME) as f:
+                self.meta = json.load(f)
+        except KeyError:
+            self.zip_file.close()
+            raise ValueError(f"{path} doesn't have a {META_FILE_NAME}, so it can't be read as a Trilium export.")
+        # noteId -> note, built on the first `get_note`
+        self.notes_by_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Close the archive."""
+        self.zip_file.close()
+
+    def iter_notes(self, include_clones: bool = False):
+        """Walk the exported notes, depth first and in the order of the tree.
+
+        Parameters
+        ----------
+        include_clones : bool, optional
+            If the extra places that a cloned note appears in should be included too, by default False (a cloned note
+            only appears where its content was exported)
+
+        Yields
+        ------
+        dict
+            The note's metadata from `!!!meta.json` (noteId, title, type, mime, attributes, ...) without its children, along
+            with its `path` in the tree (the titles of the note and its ancestors, joined by "/"), its `depth`, the
+            `parentNoteId` it appears under, and the `filePath` of its content in the archive (None for clones and notes
+            without content). Its attachments have their `filePath` as well.
+        """
+        # (note's metadata, its parent, the archive directory it is in, the titles above it)
+        stack = [(file, None, "", []) for file in reversed(self.meta.get("files", []))]
+        while stack:
+            file, parent_id, directory, titles = stack.pop()
+            if file.get("isClone") and not include_clones:
+                continue
+
+            note = self._describe(file, parent_id, directory, titles)
+            yield note
+
+            child_directory = posixpath.join(directory, file["dirFileName"]) if file.get("dirFileName") else directory
+            stack.extend(
+                (child, file.get("noteId"), child_directory, titles + [note["title"]])
+                for child in reversed(file.get("children", []))
+            )
+
+    def get_note(self, note_id: str) -> dict:
+        """Get an exported note by its ID.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note.
+
+        Returns
+        -------
+        dict
+            The note, as given by `iter_notes`.
+
+        Raises
+        ------
+        KeyError
+            If the note isn't in the archive.
+        """
+        if self.notes_by_id is None:
+            self.notes_by_id = {note["noteId"]: note for note in self.iter_notes()}
+        return self.notes_by_id[note_id]
+
+    def open_content(self, note: dict):
+        """Open the content of a note or attachment, as a binary file that is decompressed while it's read.
+
+        Parameters
+        ----------
+        note : dict
+            The note or attachment, as given by `iter_notes`.
+
+        Returns
+        -------
+        zipfile.ZipExtFile
+            The file. Close it, or use it as a context manager, when you're done.
+
+        Raises
+        ------
+        ValueError
+            If the note has no content in the archive.
+        """
+        if not note.get("filePath"):
+            raise ValueError(f"{note.get('title')} has no content in {self.path}.")
+        return self.zip_file.open(note["filePath"])
+
+    def iter_content(self, note: dict, chunk_size: int = 64 * 1024):
+        """Read the content of a note or attachment in chunks, so that even large files only take up `chunk_size` bytes of
+        memory at a time.
+
+        Parameters
+        ----------
+        note : dict
+            The note or attachment, as given by `iter_notes`.
+        chunk_size : int, optional
+            How many bytes to read at a time, by default 64 KiB
+
+        Yields
+        ------
+        bytes
+            The chunks of the content.
+        """
+        with self.open_content(note) as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+
+    def read_content(self, note: dict) -> bytes:
+        """Read the whole content of a note or attachment.
+
+        Parameters
+        ----------
+        note : dict
+            The note or attachment, as given by `iter_notes`.
+
+        Returns
+        -------
+        bytes
+            The content.
+        """
+        with self.open_content(note) as f:
+            return f.read()
+
+    def _describe(self, file: dict, parent_id: str, directory: str, titles: list) -> dict:
+        note = {key: value for key, value in file.items() if key != "children"}
+        note["parentNoteId"] = parent_id
+        note["depth"] = len(titles)
+        note["path"] = "/".join(titles + [file.get("title", "")])
+        note["filePath"] = posixpath.join(directory, file["dataFileName"]) if file.get("dataFileName") else None
+        # Attachments are stored next to the note's own content
+        note["attachments"] = [
+            {
+                **attachment,
+                "filePath": (
+                    posixpath.join(directory, attachment["dataFileName"]) if attachment.get("dataFileName") else None
+                ),
+            }
+            for attachment in file.get("attachments", [])
+        ]
+        return note
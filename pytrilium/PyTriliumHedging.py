@@ -0,0 +1,126 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class RequestHedger:
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 16,
+        max_primaries: int = 64,
+    ) -> None:
+        """Initializes the RequestHedger class. When a request takes longer than most requests to the same endpoint do, a
+        second, identical request is sent, and whichever of the two responds first is used. This cuts off the slow tail of
+        response times, at the cost of a few extra requests. Only use it for requests that are safe to repeat.
+
+        Parameters
+        ----------
+        percentile : float, optional
+            The percentile of recent response times after which the second request is sent, by default 95
+        min_delay : float, optional
+            The least amount of seconds to wait before sending the second request, by default 0.05
+        min_samples : int, optional
+            How many response times have to be known for an endpoint before its requests are hedged, by default 20
+        window : int, optional
+            How many of the most recent response times to keep per endpoint, by default 200
+        max_workers : int, optional
+            How many second requests the hedger may run at the same time, by default 16
+        max_primaries : int, optional
+            How many first requests (of endpoints whose requests are hedged) the hedger may run at the same time, by
+            default 64
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+
+        self.lock = threading.Lock()
+        # endpoint -> the most recent response times, in seconds
+        self.latencies = {}
+        # The first and second requests have their own workers, so that neither waits behind the other
+        self.primary_executor = ThreadPoolExecutor(
+            max_workers=max_primaries, thread_name_prefix="PyTriliumHedgerPrimary"
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PyTriliumHedger")
+        # `requests` is every request, `hedged` is the ones a second request was sent for, `hedge_won` is the ones where
+        # the second request responded first
+        self.stats = {"requests": 0, "hedged": 0, "hedge_won": 0}
+
+    def hedge_delay(self, endpoint: str):
+        """Works out how long to wait for a response from the endpoint, before sending a second request.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint, which should be the same for every request that is expected to take about as long.
+
+        Returns
+        -------
+        float or None
+            The delay in seconds, or None if not enough is known about the endpoint yet to hedge its requests.
+        """
+        with self.lock:
+            latencies = sorted(self.latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def call(self, endpoint: str, func):
+        """Calls the function, calling it a second time if it takes longer than usual for the endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint that the function makes a request to.
+        func : callable
+            The function that makes the request, without arguments.
+
+        Returns
+        -------
+        Any
+            What the first successful call returned. If both calls fail, the exception of the first one is raised.
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+
+        delay = self.hedge_delay(endpoint)
+        start = time.monotonic()
+        if delay is None:
+            result = func()
+            self._record(endpoint, time.monotonic() - start)
+            return result
+
+        # Each request runs in a copy of the caller's context, so that e.g. the current tracing span carries over
+        primary = self.primary_executor.submit(contextvars.copy_context().run, func)
+        done, _ = wait([primary], timeout=delay)
+        if not done:
+            with self.lock:
+                self.stats["hedged"] += 1
+            hedge = self.executor.submit(contextvars.copy_context().run, func)
+            done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            # If the first one to finish failed, the other one may still succeed
+            if winner.exception() is not None:
+                other = hedge if winner is primary else primary
+                if other.exception() is None:
+                    winner = other
+            if winner is hedge and winner.exception() is None:
+                with self.lock:
+                    self.stats["hedge_won"] += 1
+        else:
+            winner = primary
+
+        result = winner.result()
+        self._record(endpoint, time.monotonic() - start)
+        return result
+
+    def _record(self, endpoint: str, latency: float) -> None:
+        with self.lock:
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(latency)
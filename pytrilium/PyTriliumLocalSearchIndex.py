@@ -0,0 +1,344 @@
+import bisect
+import re
+import threading
+from html.parser import HTMLParser
+
+# The note types whose content is text that is worth indexing
+INDEXED_NOTE_TYPES = ["text", "code", "mermaid"]
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Matches a phrase in quotes, a label filter (`#label`, `#label=value` or `#!label`), or a single word
+QUERY_PATTERN = re.compile(r'"([^"]*)"|#(!?)([\w:-]+)(?:=(\S+))?|(\S+)')
+
+# Trilium's `ancestorDepth` is written as e.g. `eq1`, `lt4` or `gt2`
+ANCESTOR_DEPTH_PATTERN = re.compile(r"^(eq|lt|gt)(\d+)$")
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Collects the text of an HTML document, skipping anything inside of <script> and <style> tags."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def strip_html(html: str) -> str:
+    """Strips the HTML tags from the given string, leaving just the text.
+
+    Parameters
+    ----------
+    html : str
+        The HTML to strip.
+
+    Returns
+    -------
+    str
+        The text of the HTML document, with the tags removed.
+    """
+    extractor = HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return " ".join(extractor.parts)
+
+
+def tokenize(text: str) -> list:
+    """Splits the text into lowercase word tokens.
+
+    Parameters
+    ----------
+    text : str
+        The text to tokenize.
+
+    Returns
+    -------
+    list
+        The tokens, in the order they appear in the text.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LocalSearchIndex:
+    def __init__(self) -> None:
+        """Initializes an empty, in-memory inverted index over note titles and contents.
+
+        Notes are fed into the index with `add_note`, and the HTML of their content is stripped once at that point, so
+        that queries never have to touch the raw content again.
+        """
+        self.lock = threading.RLock()
+
+        # noteId -> the note's metadata, as returned by Trilium
+        self.notes = {}
+        # field -> token -> noteId -> positions of the token within the field
+        self.postings = {"title": {}, "content": {}}
+        # noteId -> field -> the distinct tokens of that field, so that a note can be removed without a full scan
+        self.note_tokens = {}
+        # Every token in the index, kept sorted so that prefix queries are a binary search
+        self.vocabulary = []
+        # The newest `utcDateModified` that has been indexed
+        self.high_water_mark = ""
+        # The scope that the index was built with, so that it can be refreshed with the same scope
+        self.ancestor_note_id = None
+        self.include_archived_notes = True
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self.notes
+
+    def add_note(self, note: dict, content: str = "") -> None:
+        """Adds a note to the index, replacing the previous version of it if it was already indexed.
+
+        Parameters
+        ----------
+        note : dict
+            The note's metadata, as returned by Trilium.
+        content : str, optional
+            The note's content. HTML is stripped from `text` notes, by default ""
+        """
+        if note.get("type") == "text" and content:
+            content = strip_html(content)
+
+        with self.lock:
+            self.remove_note(note["noteId"])
+            self.notes[note["noteId"]] = note
+            self.high_water_mark = max(self.high_water_mark, note.get("utcDateModified", ""))
+            self._index_field("title", note["noteId"], note.get("title", ""))
+            self._index_field("content", note["noteId"], content)
+
+    def remove_note(self, note_id: str) -> None:
+        """Removes a note from the index. Nothing happens if the note isn't indexed.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note.
+        """
+        with self.lock:
+            if self.notes.pop(note_id, None) is None:
+                return
+            for field, tokens in self.note_tokens.pop(note_id).items():
+                field_postings = self.postings[field]
+                for token in tokens:
+                    del field_postings[token][note_id]
+                    if not field_postings[token]:
+                        del field_postings[token]
+                        self._forget_token(token)
+
+    def search(
+        self,
+        query: str,
+        fast_search: bool = False,
+        include_archived_notes: bool = False,
+        ancestor_note_id: str = "",
+        ancestor_depth: str = "",
+        order_by: str = "",
+        limit: int = 0,
+        debug: bool = False,
+    ) -> dict:
+        """Searches the index. Words match whole words, `word*` matches words starting with `word`, `"a phrase"` matches the
+        words in that exact order, and `#label`, `#label=value` and `#!label` filter on the note's labels.
+
+        Parameters
+        ----------
+        query : str
+            The search query.
+        fast_search : bool, optional
+            If True, only the titles are searched and not the contents, by default False
+        include_archived_notes : bool, optional
+            If notes with the `archived` label should be included, by default False
+        ancestor_note_id : str, optional
+            Only return notes that are underneath this Note, by default ""
+        ancestor_depth : str, optional
+            How deep underneath `ancestor_note_id` the notes may be, e.g. `eq1`, `lt4` or `gt2`, by default ""
+        order_by : str, optional
+            The note property to order the results by, e.g. `title`. By default "", which orders by relevance
+        limit : int, optional
+            The maximum number of results to return, by default 0 (no limit)
+        debug : bool, optional
+            If True, the parsed query is included in the response as `debugInfo`, by default False
+
+        Returns
+        -------
+        dict
+            The matching notes, in the same shape as Trilium's search response, e.g. `{"results": [...]}`.
+        """
+        fields = ["title"] if fast_search else ["title", "content"]
+        terms, label_filters = self._parse_query(query)
+
+        with self.lock:
+            # noteId -> how many times the terms occur in it, which is used for relevance
+            scores = None
+            for kind, value in terms:
+                if kind == "phrase":
+                    matches = self._match_phrase(value, fields)
+                elif kind == "prefix":
+                    matches = self._match_prefix(value, fields)
+                else:
+                    matches = self._match_token(value, fields)
+
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        note_id: scores[note_id] + count for note_id, count in matches.items() if note_id in scores
+                    }
+                if not scores:
+                    break
+
+            if scores is None:
+                # Only labels were given, so every note is a candidate
+                scores = {note_id: 0 for note_id in self.notes}
+
+            results = []
+            for note_id, score in scores.items():
+                note = self.notes[note_id]
+                if not include_archived_notes and self._has_label(note, "archived"):
+                    continue
+                if not all(self._matches_label_filter(note, *label_filter) for label_filter in label_filters):
+                    continue
+                if ancestor_note_id and not self._is_within(note_id, ancestor_note_id, ancestor_depth):
+                    continue
+                results.append((score, note))
+
+        if order_by:
+            results.sort(key=lambda result: str(result[1].get(order_by, "")))
+        else:
+            results.sort(key=lambda result: result[0], reverse=True)
+        if limit:
+            results = results[:limit]
+
+        response = {"results": [note for _, note in results]}
+        if debug:
+            response["debugInfo"] = {"terms": terms, "labelFilters": label_filters, "indexedNotes": len(self.notes)}
+        return response
+
+    def _index_field(self, field: str, note_id: str, text: str) -> None:
+        field_postings = self.postings[field]
+        tokens = tokenize(text)
+        self.note_tokens.setdefault(note_id, {})[field] = set(tokens)
+        for position, token in enumerate(tokens):
+            if token not in field_postings:
+                field_postings[token] = {}
+                if not self._knows_token(token):
+                    bisect.insort(self.vocabulary, token)
+            field_postings[token].setdefault(note_id, []).append(position)
+
+    def _knows_token(self, token: str) -> bool:
+        index = bisect.bisect_left(self.vocabulary, token)
+        return index < len(self.vocabulary) and self.vocabulary[index] == token
+
+    def _forget_token(self, token: str) -> None:
+        # The token might still be used by another field
+        if any(token in field_postings for field_postings in self.postings.values()):
+            return
+        index = bisect.bisect_left(self.vocabulary, token)
+        if index < len(self.vocabulary) and self.vocabulary[index] == token:
+            del self.vocabulary[index]
+
+    def _parse_query(self, query: str):
+        terms = []
+        label_filters = []
+        for phrase, negated, label_name, label_value, word in QUERY_PATTERN.findall(query):
+            if label_name:
+                label_filters.append((label_name, label_value or None, bool(negated)))
+            elif phrase:
+                tokens = tokenize(phrase)
+                if len(tokens) == 1:
+                    terms.append(("token", tokens[0]))
+                elif tokens:
+                    terms.append(("phrase", tokens))
+            elif word.endswith("*") and tokenize(word):
+                terms.append(("prefix", tokenize(word)[0]))
+            else:
+                terms.extend(("token", token) for token in tokenize(word))
+        return terms, label_filters
+
+    def _match_token(self, token: str, fields: list) -> dict:
+        matches = {}
+        for field in fields:
+            for note_id, positions in self.postings[field].get(token, {}).items():
+                matches[note_id] = matches.get(note_id, 0) + len(positions)
+        return matches
+
+    def _match_prefix(self, prefix: str, fields: list) -> dict:
+        matches = {}
+        index = bisect.bisect_left(self.vocabulary, prefix)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(prefix):
+            for note_id, count in self._match_token(self.vocabulary[index], fields).items():
+                matches[note_id] = matches.get(note_id, 0) + count
+            index += 1
+        return matches
+
+    def _match_phrase(self, tokens: list, fields: list) -> dict:
+        matches = {}
+        for field in fields:
+            field_postings = self.postings[field]
+            if any(token not in field_postings for token in tokens):
+                continue
+            # Only the notes that contain every token of the phrase can contain the phrase
+            candidates = set(field_postings[tokens[0]])
+            for token in tokens[1:]:
+                candidates &= field_postings[token].keys()
+            for note_id in candidates:
+                following = [set(field_postings[token][note_id]) for token in tokens[1:]]
+                count = sum(
+                    1
+                    for start in field_postings[tokens[0]][note_id]
+                    if all(start + offset + 1 in positions for offset, positions in enumerate(following))
+                )
+                if count:
+                    matches[note_id] = matches.get(note_id, 0) + count
+        return matches
+
+    def _has_label(self, note: dict, name: str, value: str = None) -> bool:
+        for attribute in note.get("attributes", []):
+            if attribute.get("type") == "label" and attribute.get("name") == name:
+                if value is None or attribute.get("value") == value:
+                    return True
+        return False
+
+    def _matches_label_filter(self, note: dict, name: str, value: str, negated: bool) -> bool:
+        return self._has_label(note, name, value) != negated
+
+    def _is_within(self, note_id: str, ancestor_note_id: str, ancestor_depth: str = "") -> bool:
+        depth_match = ANCESTOR_DEPTH_PATTERN.match(ancestor_depth or "")
+
+        # Breadth first up through the parents, so that we find the shortest depth first
+        depth = 0
+        level = {note_id}
+        seen = set(level)
+        while level:
+            depth += 1
+            parents = set()
+            for current in level:
+                note = self.notes.get(current)
+                if note:
+                    parents.update(note.get("parentNoteIds", []))
+            if ancestor_note_id in parents:
+                if not depth_match:
+                    return True
+                operator, limit = depth_match.group(1), int(depth_match.group(2))
+                if operator == "eq" and depth == limit:
+                    return True
+                if operator == "lt" and depth < limit:
+                    return True
+                if operator == "gt" and depth > limit:
+                    return True
+            level = parents - seen
+            seen |= level
+        return False
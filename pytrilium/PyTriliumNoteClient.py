@@ -1,11 +1,30 @@
+import contextvars
+import difflib
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
 import requests
 from .PyTriliumClient import PyTriliumClient
+from .PyTriliumLocalSearchIndex import INDEXED_NOTE_TYPES, LocalSearchIndex
+from .PyTriliumNoteProxy import NoteLoader, NoteProxy
+from .PyTriliumNoteTable import NoteTable
+from .PyTriliumTracing import traced
+from .PyTriliumWriteBuffer import WriteBuffer
+
+# The oldest possible `utcDateModified`, used as the starting high-water mark for `watch`
+EPOCH_UTC_DATE = "1970-01-01 00:00:00.000Z"
 
 
 class PyTriliumNoteClient(PyTriliumClient):
     def __init__(self, url, token, debug=False) -> None:
         super().__init__(url, token, debug)
 
+        # The optional local search index, see `build_local_index`
+        self.local_search_index = None
+
+    @traced
     def get_note_by_id(self, note_id: str) -> dict:
         """Given the Note's ID, this will return the Note's information.
 
@@ -21,6 +40,7 @@ class PyTriliumNoteClient(PyTriliumClient):
         """
         return self.make_request(f"/notes/{note_id}").json()
 
+    @traced
     def get_note_content_by_id(self, note_id: str) -> str:
         """Given the Note's ID, this will return the Note's content.
 
@@ -34,9 +54,36 @@ class PyTriliumNoteClient(PyTriliumClient):
         str
             The content of the note, most likely in HTML format.
         """
-        return self.make_request(f"/notes/{note_id}/content").text
+        cache_validator = None
+        if self.disk_cache is not None:
+            # The content only changes when its blob does, so this small request can save fetching all of the content
+            note = self.make_request(f"/notes/{note_id}").json()
+            cache_validator = note.get("blobId") or note.get("utcDateModified")
+        return self.make_request(f"/notes/{note_id}/content", cache_validator=cache_validator).text
+
+    @traced
+    def get_note_content_view_by_id(self, note_id: str) -> memoryview:
+        """Given the Note's ID, this will return the Note's content as a read-only view of its bytes. When the disk cache
+        is enabled, the cached content is memory-mapped instead of being copied into memory.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note, this can be seen by clicking the 'i' on the note, near the top.
 
-    def put_note_content_by_id(self, note_id: str, data: str) -> dict:
+        Returns
+        -------
+        memoryview
+            The content of the note, as bytes.
+        """
+        cache_validator = None
+        if self.disk_cache is not None:
+            note = self.make_request(f"/notes/{note_id}").json()
+            cache_validator = note.get("blobId") or note.get("utcDateModified")
+        return self.get_content_view(f"/notes/{note_id}/content", cache_validator)
+
+    @traced
+    def put_note_content_by_id(self, note_id: str, data: str, compress: bool = None) -> dict:
         """Given the Note's ID, this will update the Note's content.
 
         Parameters
@@ -45,14 +92,17 @@ class PyTriliumNoteClient(PyTriliumClient):
             Trilium's ID for the Note, this can be seen by clicking the 'i' on the note, near the top.
         data : str
             The data to send to the Trilium API.This should be in the format of a string.
+        compress : bool, optional
+            If the content should be gzipped before it is sent, by default None (uses `compress_request_bodies`)
 
         Returns
         -------
         dict
             The JSON response from Trilium, as a dictionary.
         """
-        return self.make_request(f"/notes/{note_id}/content", method="PUT", data=data).json()
+        return self.make_request(f"/notes/{note_id}/content", method="PUT", data=data, compress=compress).json()
 
+    @traced
     def patch_note_by_id(self, note_id: str, data: str) -> dict:
         """Given the Note's ID, this will update the Note's content.
 
@@ -70,6 +120,44 @@ class PyTriliumNoteClient(PyTriliumClient):
         """
         return self.make_request(f"/notes/{note_id}", method="PATCH", data=data).json()
 
+    def note(self, note_id: str, loader: NoteLoader = None) -> NoteProxy:
+        """Get a lazy proxy for a note. Its `children`, `parents`, `attributes` and `content` are only fetched when they're
+        used, and the fetches for sibling notes are sent together as one concurrent batch, so walking the tree note by note
+        doesn't cost a request per note.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note, this can be seen by clicking the 'i' on the note, near the top.
+        loader : NoteLoader, optional
+            The loader to fetch the notes with, by default None (a new loader, so nothing that was fetched before is reused)
+
+        Returns
+        -------
+        NoteProxy
+            The proxy for the note.
+        """
+        return (loader or NoteLoader(self)).note(note_id)
+
+    def write_buffer(self, window: float = 1.0, max_pending: int = 100) -> WriteBuffer:
+        """Create a buffer that merges rapid successive updates to the same note into a single write. Updates are queued
+        with the buffer's `put_note_content` and `patch_note`, and written after `window` seconds.
+
+        Parameters
+        ----------
+        window : float, optional
+            How many seconds an update may wait before it is written, by default 1.0
+        max_pending : int, optional
+            How many notes may have updates waiting before they're all written, by default 100
+
+        Returns
+        -------
+        WriteBuffer
+            The buffer. Close it, or use it as a context manager, to write the remaining updates when you're done.
+        """
+        return WriteBuffer(self, window=window, max_pending=max_pending)
+
+    @traced
     def delete_note_by_id(self, note_id: str) -> dict:
         """Given the Note's ID, this will delete the Note.
 
@@ -85,8 +173,12 @@ class PyTriliumNoteClient(PyTriliumClient):
         """
         return self.make_request(f"/notes/{note_id}", method="DELETE").json()
 
-    def export_note_by_id(self, note_id: str, filepath_to_save_export_zip: str, format="html") -> bool:
-        """Given the Note's ID, export itself and all child notes into a singular .zip archive.
+    @traced
+    def export_note_by_id(
+        self, note_id: str, filepath_to_save_export_zip: str, format="html", resume: bool = True
+    ) -> bool:
+        """Given the Note's ID, export itself and all child notes into a singular .zip archive. The archive is streamed to
+        disk, and checked once it has been downloaded.
 
         Parameters
         ----------
@@ -96,6 +188,8 @@ class PyTriliumNoteClient(PyTriliumClient):
             The path of where to save the .zip archive that is generated by Trilium.
         format : str, optional
             The format to export the Notes in, by default "html". Can also be "markdown".
+        resume : bool, optional
+            If a previous, interrupted export to the same path should be continued where possible, by default True
 
         Returns
         -------
@@ -114,15 +208,18 @@ class PyTriliumNoteClient(PyTriliumClient):
 
         try:
             params = {"format": format}
-            response = self.make_request(f"/notes/{note_id}/export", params=params)
+            self.download_file(f"/notes/{note_id}/export", filepath_to_save_export_zip, params=params, resume=resume)
 
-            with open(filepath_to_save_export_zip, "wb") as f:
-                f.write(response.content)
+            with zipfile.ZipFile(filepath_to_save_export_zip) as archive:
+                corrupt_file = archive.testzip()
+            if corrupt_file is not None:
+                raise zipfile.BadZipFile(f"{corrupt_file} is corrupt in {filepath_to_save_export_zip}")
         except Exception as e:
             print(e)
             return False
         return True
 
+    @traced
     def create_note_revision(self, note_id: str, data: str, format: str = "html") -> dict:
         """Given the Note's ID, create a new revision of the Note.
 
@@ -144,6 +241,7 @@ class PyTriliumNoteClient(PyTriliumClient):
         params = {"format": format}
         return self.make_request(f"/notes/{note_id}/note-revision", method="POST", data=data, params=params).json()
 
+    @traced
     def refresh_note_ordering(self, parent_note_id: str) -> dict:
         """Given the Note's ID, refresh the node ordering of the Note.
 
@@ -159,6 +257,7 @@ class PyTriliumNoteClient(PyTriliumClient):
         """
         return self.make_request(f"/refresh-note-ordering/{parent_note_id}", method="POST")
 
+    @traced
     def create_note(self, data: str) -> dict:
         """Create a new Note.
 
@@ -174,6 +273,7 @@ class PyTriliumNoteClient(PyTriliumClient):
         """
         return self.make_request("/create-note", method="POST", data=data).json()
 
+    @traced
     def search(
         self,
         query: str,
@@ -232,3 +332,460 @@ class PyTriliumNoteClient(PyTriliumClient):
                 query = f"{query}&{key}={value}"
 
         return self.make_request(f"/notes{query}").json()
+
+    @traced
+    def search_modified_since(
+        self, since: str, ancestor_note_id: str = None, include_archived_notes: bool = False
+    ) -> list:
+        """Search for every note that was modified at or after the given time.
+
+        Parameters
+        ----------
+        since : str
+            The `utcDateModified` to search from, e.g. `2021-01-01 00:00:00.000Z`
+        ancestor_note_id : str, optional
+            Only return notes underneath this Note, by default None
+        include_archived_notes : bool, optional
+            If archived notes should be returned as well, by default False
+
+        Returns
+        -------
+        list
+            The notes that were modified at or after `since`.
+        """
+        params = {"search": f"note.utcDateModified >= '{since}'"}
+        if ancestor_note_id:
+            params["ancestorNoteId"] = ancestor_note_id
+        if include_archived_notes:
+            params["includeArchivedNotes"] = "true"
+        return self.make_request("/notes", params=params).json().get("results", [])
+
+    def watch(
+        self,
+        ancestor_note_id: str = None,
+        interval: float = 30.0,
+        debounce: float = 0.0,
+        emit_existing: bool = False,
+        deletion_sweep_every: int = 10,
+        include_archived_notes: bool = False,
+    ):
+        """Watch Trilium for note changes, yielding an event for every note that is created, modified, or deleted.
+
+        A high-water mark is kept on `utcDateModified`, so each poll only asks Trilium for the notes that changed since
+        the last poll. Deleted notes can't be found by a delta search, so every `deletion_sweep_every` polls the set of
+        known note IDs is compared against the notes that still exist.
+
+        This is a regular generator, so Trilium is only polled when the consumer asks for the next event. A slow consumer
+        therefore slows down the polling instead of having events pile up in memory.
+
+        Parameters
+        ----------
+        ancestor_note_id : str, optional
+            Only watch notes underneath this Note, by default None (watch every note).
+        interval : float, optional
+            How many seconds to wait between polls when there is nothing to yield, by default 30.0
+        debounce : float, optional
+            How many seconds a note has to stay unchanged before its event is yielded. Rapid successive changes to the same
+            note are collapsed into a single event, by default 0.0
+        emit_existing : bool, optional
+            If True, a `created` event is yielded for every note that already exists when the watch starts, by default False
+        deletion_sweep_every : int, optional
+            Check for deleted notes every this many polls. Set to 0 to never check for deleted notes, by default 10
+        include_archived_notes : bool, optional
+            If archived notes should be watched as well, by default False
+
+        Yields
+        ------
+        dict
+            The event, e.g. `{"event": "modified", "noteId": "MLDQ3EGWsU8e", "note": {...}}`. The `event` is one of
+            `created`, `modified` or `deleted`. For `deleted` events, `note` is the last version of the note that was seen.
+        """
+        # noteId -> the last version of the note that we've seen
+        known_notes = {}
+        # noteId -> [event, monotonic time of the last change]
+        pending_events = {}
+        high_water_mark = EPOCH_UTC_DATE
+        polls = 0
+
+        def queue_event(event: str, note: dict) -> None:
+            note_id = note["noteId"]
+            previous = pending_events.get(note_id)
+            if previous:
+                # Collapse the events for the same note that haven't been yielded yet
+                if previous[0]["event"] == "created" and event == "deleted":
+                    del pending_events[note_id]
+                    return
+                if previous[0]["event"] == "created" and event == "modified":
+                    event = "created"
+            pending_events[note_id] = [{"event": event, "noteId": note_id, "note": note}, time.monotonic()]
+
+        # Take the initial snapshot, so that we only report what changes from here on out
+        for note in self.search_modified_since(EPOCH_UTC_DATE, ancestor_note_id, include_archived_notes):
+            known_notes[note["noteId"]] = note
+            high_water_mark = max(high_water_mark, note["utcDateModified"])
+            if emit_existing:
+                queue_event("created", note)
+
+        last_poll = time.monotonic()
+        while True:
+            ready_before = time.monotonic() - debounce
+            ready = [note_id for note_id, (_, changed_at) in pending_events.items() if changed_at <= ready_before]
+            for note_id in ready:
+                yield pending_events.pop(note_id)[0]
+            if ready:
+                continue
+
+            # Sleep until the next poll is due, or until a debounced event becomes ready, whichever is first
+            next_poll = last_poll + interval
+            wake_at = next_poll
+            if pending_events:
+                wake_at = min(wake_at, min(changed_at for _, changed_at in pending_events.values()) + debounce)
+            time.sleep(max(0.0, wake_at - time.monotonic()))
+            if time.monotonic() < next_poll:
+                continue
+            last_poll = time.monotonic()
+            polls += 1
+
+            # We search with >= so that changes within the same millisecond as the mark aren't lost,
+            # so skip the notes that we've already seen at this exact version
+            for note in self.search_modified_since(high_water_mark, ancestor_note_id, include_archived_notes):
+                note_id = note["noteId"]
+                previous = known_notes.get(note_id)
+                if previous and previous["utcDateModified"] == note["utcDateModified"]:
+                    continue
+                known_notes[note_id] = note
+                high_water_mark = max(high_water_mark, note["utcDateModified"])
+                queue_event("modified" if previous else "created", note)
+
+            if deletion_sweep_every and polls % deletion_sweep_every == 0:
+                existing_note_ids = {
+                    note["noteId"]
+                    for note in self.search_modified_since(EPOCH_UTC_DATE, ancestor_note_id, include_archived_notes)
+                }
+                for note_id in list(known_notes):
+                    if note_id not in existing_note_ids:
+                        queue_event("deleted", known_notes.pop(note_id))
+
+    @traced
+    def transform_notes(
+        self,
+        note_ids: list,
+        transform,
+        processes: int = None,
+        fetch_workers: int = 8,
+        max_pending: int = 64,
+        dry_run: bool = False,
+    ) -> dict:
+        """Rewrite the content of many notes with the given function. Fetching and writing the contents happens in a pool of
+        threads, while the (CPU heavy) transform runs in a pool of processes, so all three overlap with each other. A note's
+        content is only written back to Trilium if the transform actually changed it.
+
+        Parameters
+        ----------
+        note_ids : list
+            The IDs of the notes to transform.
+        transform : callable
+            The function that is given a note's current content as a string, and returns its new content. When `processes`
+            is not 0 this has to be picklable, i.e. a function defined at the top level of a module.
+        processes : int, optional
+            How many processes to run the transform in. Set to 0 to run the transform in the fetching threads instead, by
+            default None (one per CPU)
+        fetch_workers : int, optional
+            How many note contents to fetch and write at the same time, by default 8
+        max_pending : int, optional
+            The maximum number of notes that are in the pipeline at the same time. This keeps fetches from getting too far
+            ahead of the transforms and writes, so memory use stays bounded, by default 64
+        dry_run : bool, optional
+            If True, nothing is written back to Trilium. Instead, a unified diff of every change is returned, by default False
+
+        Returns
+        -------
+        dict
+            A summary of the run, e.g. `{"changed": [...], "unchanged": [...], "failed": {noteId: error}, "diffs": {...}}`.
+            `diffs` is only filled in when `dry_run` is True.
+        """
+        summary = {"changed": [], "unchanged": [], "failed": {}, "diffs": {}}
+        summary_lock = threading.Lock()
+        pending = threading.BoundedSemaphore(max_pending)
+
+        io_executor = ThreadPoolExecutor(max_workers=fetch_workers)
+        cpu_executor = ProcessPoolExecutor(max_workers=processes) if processes != 0 else io_executor
+        # The steps run in copies of the caller's context, so that e.g. their requests' spans are children of this call's
+        # span. The callbacks that submit the later steps run on the workers, which is why the context is taken now.
+        context = contextvars.copy_context()
+
+        def write_content(note_id: str, content: str) -> None:
+            resp = self.make_request(f"/notes/{note_id}/content", method="PUT", data=content.encode("utf-8"))
+            if resp.status_code not in self.valid_response_codes:
+                raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+
+        def run(note_id: str, done: Future) -> None:
+            def finish(outcome: str, value=None) -> None:
+                with summary_lock:
+                    if outcome == "failed":
+                        self.logger.warning(f"Transforming note {note_id} failed: {value}")
+                        summary["failed"][note_id] = value
+                    else:
+                        summary[outcome].append(note_id)
+                        if value:
+                            summary["diffs"][note_id] = value
+                pending.release()
+                done.set_result(outcome)
+
+            def on_fetched(fetch_future: Future) -> None:
+                if fetch_future.exception():
+                    return finish("failed", fetch_future.exception())
+                content = fetch_future.result()
+                try:
+                    if cpu_executor is io_executor:
+                        transform_future = cpu_executor.submit(context.copy().run, transform, content)
+                    else:
+                        # A context can't be sent to another process
+                        transform_future = cpu_executor.submit(transform, content)
+                except Exception as e:
+                    # e.g. BrokenProcessPool, after a worker process died. Raising here would be swallowed by the
+                    # callback machinery and leave the note unfinished forever.
+                    return finish("failed", e)
+                transform_future.add_done_callback(lambda transform_future: on_transformed(content, transform_future))
+
+            def on_transformed(content: str, transform_future: Future) -> None:
+                if transform_future.exception():
+                    return finish("failed", transform_future.exception())
+                new_content = transform_future.result()
+                if new_content == content:
+                    return finish("unchanged")
+                if dry_run:
+                    # Without keepends, so that a last line without a newline (as in most HTML notes) isn't glued to
+                    # the next line of the diff
+                    diff = difflib.unified_diff(
+                        content.splitlines(),
+                        new_content.splitlines(),
+                        fromfile=f"{note_id} (current)",
+                        tofile=f"{note_id} (transformed)",
+                        lineterm="",
+                    )
+                    return finish("changed", "\n".join(diff) + "\n")
+                try:
+                    write_future = io_executor.submit(context.copy().run, write_content, note_id, new_content)
+                except Exception as e:
+                    return finish("failed", e)
+                write_future.add_done_callback(on_written)
+
+            def on_written(write_future: Future) -> None:
+                if write_future.exception():
+                    return finish("failed", write_future.exception())
+                finish("changed")
+
+            io_executor.submit(context.copy().run, self.get_note_content_by_id, note_id).add_done_callback(on_fetched)
+
+        completions = []
+        try:
+            for note_id in note_ids:
+                # Wait for room in the pipeline before fetching the next note
+                pending.acquire()
+                done = Future()
+                completions.append(done)
+                run(note_id, done)
+            wait(completions)
+        finally:
+            io_executor.shutdown()
+            if cpu_executor is not io_executor:
+                cpu_executor.shutdown()
+        return summary
+
+    @traced
+    def build_local_index(
+        self, ancestor_note_id: str = None, include_archived_notes: bool = True, max_workers: int = 8
+    ) -> LocalSearchIndex:
+        """Build a local search index over the notes' titles and contents, which `search_local` can then answer queries from
+        without a round trip to Trilium. Use `refresh_local_index` to keep it up to date afterwards.
+
+        Parameters
+        ----------
+        ancestor_note_id : str, optional
+            Only index the notes underneath this Note, by default None (index every note).
+        include_archived_notes : bool, optional
+            If archived notes should be indexed as well. They are still left out of `search_local` by default, by default True
+        max_workers : int, optional
+            How many note contents to fetch at the same time, by default 8
+
+        Returns
+        -------
+        LocalSearchIndex
+            The newly built index, which is also stored on the client as `local_search_index`.
+        """
+        index = LocalSearchIndex()
+        index.ancestor_note_id = ancestor_note_id
+        index.include_archived_notes = include_archived_notes
+        self.local_search_index = index
+
+        notes = self.search_modified_since(EPOCH_UTC_DATE, ancestor_note_id, include_archived_notes)
+        self._index_notes(notes, max_workers)
+        return index
+
+    @traced
+    def refresh_local_index(self, check_deleted: bool = False, max_workers: int = 8) -> int:
+        """Bring the local search index up to date, by only re-indexing the notes that were modified since it was last
+        built or refreshed.
+
+        Parameters
+        ----------
+        check_deleted : bool, optional
+            If True, also remove the notes that were deleted from Trilium. This requires listing every note, by default False
+        max_workers : int, optional
+            How many note contents to fetch at the same time, by default 8
+
+        Returns
+        -------
+        int
+            How many notes were added, updated, or removed.
+
+        Raises
+        ------
+        ValueError
+            If `build_local_index` hasn't been called yet.
+        """
+        index = self.local_search_index
+        if index is None:
+            raise ValueError("There is no local search index yet, please call build_local_index first.")
+
+        modified_notes = self.search_modified_since(
+            index.high_water_mark or EPOCH_UTC_DATE, index.ancestor_note_id, index.include_archived_notes
+        )
+        changed_notes = [
+            note
+            for note in modified_notes
+            if note["noteId"] not in index
+            or index.notes[note["noteId"]].get("utcDateModified") != note.get("utcDateModified")
+        ]
+        self._index_notes(changed_notes, max_workers)
+        changes = len(changed_notes)
+
+        if check_deleted:
+            existing_note_ids = {
+                note["noteId"]
+                for note in self.search_modified_since(
+                    EPOCH_UTC_DATE, index.ancestor_note_id, index.include_archived_notes
+                )
+            }
+            for note_id in [note_id for note_id in index.notes if note_id not in existing_note_ids]:
+                index.remove_note(note_id)
+                changes += 1
+        return changes
+
+    @traced
+    def search_local(
+        self,
+        query: str,
+        fast_search: bool = False,
+        include_archived_notes: bool = False,
+        ancestor_note_id: str = "",
+        ancestor_depth: str = "",
+        order_by: str = "",
+        limit: int = 0,
+        debug: bool = False,
+    ) -> dict:
+        """Search the local search index built by `build_local_index`. This takes the same parameters as `search`, but the
+        query supports words, `word*` prefixes, `"exact phrases"`, and `#label`, `#label=value` or `#!label` filters.
+
+        Parameters
+        ----------
+        query : str
+            The search query, e.g. `towers #book` or `"The Lord of the Rings" tolk*`
+        fast_search : bool, optional
+            If True, only the titles are searched and not the contents, by default False
+        include_archived_notes : bool, optional
+            If notes with the `archived` label should be included, by default False
+        ancestor_note_id : str, optional
+            Only return notes that are underneath this Note, by default ""
+        ancestor_depth : str, optional
+            How deep underneath `ancestor_note_id` the notes may be, e.g. `eq1`, `lt4` or `gt2`, by default ""
+        order_by : str, optional
+            The note property to order the results by, e.g. `title`. By default "", which orders by relevance
+        limit : int, optional
+            The maximum number of results to return, by default 0 (no limit)
+        debug : bool, optional
+            If True, the parsed query is included in the response as `debugInfo`, by default False
+
+        Returns
+        -------
+        dict
+            The matching notes, in the same shape as the response from `search`.
+
+        Raises
+        ------
+        ValueError
+            If `build_local_index` hasn't been called yet.
+        """
+        if self.local_search_index is None:
+            raise ValueError("There is no local search index yet, please call build_local_index first.")
+        return self.local_search_index.search(
+            query,
+            fast_search=fast_search,
+            include_archived_notes=include_archived_notes,
+            ancestor_note_id=ancestor_note_id,
+            ancestor_depth=ancestor_depth,
+            order_by=order_by,
+            limit=limit,
+            debug=debug,
+        )
+
+    @traced
+    def build_note_table(
+        self,
+        notes: list = None,
+        ancestor_note_id: str = None,
+        include_archived_notes: bool = True,
+        include_content_sizes: bool = False,
+        max_workers: int = None,
+    ) -> NoteTable:
+        """Put the metadata of many notes and their attributes into a columnar table of NumPy arrays, for fast reports
+        such as counting notes per label value. Requires the `analytics` extra, i.e. `pip install pytrilium[analytics]`.
+
+        Parameters
+        ----------
+        notes : list, optional
+            The notes to put in the table, e.g. from `search`, by default None (fetches every note)
+        ancestor_note_id : str, optional
+            When fetching the notes, only fetch the ones underneath this Note, by default None (every note)
+        include_archived_notes : bool, optional
+            When fetching the notes, if archived notes should be fetched as well, by default True
+        include_content_sizes : bool, optional
+            If every note's content should be fetched to fill the table's "contentSize" column, by default False
+        max_workers : int, optional
+            How many contents to fetch at the same time, by default None (uses `self.max_workers`)
+
+        Returns
+        -------
+        NoteTable
+            The table.
+        """
+        if notes is None:
+            notes = self.search_modified_since(EPOCH_UTC_DATE, ancestor_note_id, include_archived_notes)
+
+        content_sizes = None
+        if include_content_sizes:
+
+            def get_content_size(note: dict) -> int:
+                resp = self.make_request(f"/notes/{note['noteId']}/content", cache_validator=note.get("blobId"))
+                if resp.status_code not in self.valid_response_codes:
+                    raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+                return len(resp.content)
+
+            sizes = self.map_concurrently(get_content_size, notes, max_workers)
+            # The notes whose content couldn't be fetched get a size of -1, like notes that aren't in `content_sizes`
+            content_sizes = {
+                note["noteId"]: size for note, size in zip(notes, sizes) if not isinstance(size, Exception)
+            }
+        return NoteTable.from_notes(notes, content_sizes)
+
+    def _index_notes(self, notes: list, max_workers: int) -> None:
+        def index_note(note: dict) -> None:
+            content = ""
+            if note.get("type") in INDEXED_NOTE_TYPES:
+                content = self.get_note_content_by_id(note["noteId"])
+            self.local_search_index.add_note(note, content)
+
+        for result in self.map_concurrently(index_note, notes, max_workers):
+            if isinstance(result, Exception):
+                raise result
@@ -0,0 +1,259 @@
+import contextvars
+import threading
+from concurrent.futures import Future
+
+# The note types whose contents are fetched along with a sibling's, the contents of the other types (images, files, ...)
+# may be large, so they're only fetched when they're asked for
+PREFETCHED_CONTENT_TYPES = ["text", "code", "mermaid"]
+
+
+class NoteLoader:
+    def __init__(self, client, window: float = 0.002, max_batch: int = 100) -> None:
+        """Initializes the NoteLoader class, which collects the notes and contents that are asked for, and fetches them
+        together as one concurrent batch. Every note and content is only fetched once per loader, so a loader should live
+        for about as long as one piece of work (a script run, a request to your app), after which its results may be stale.
+
+        A batch is sent when `window` seconds have passed since the first load in it, or when `max_batch` loads are waiting.
+        Loads from other threads within the window join the same batch, and code that walks the tree one note at a time
+        still gets the siblings of every list of children (or parents) in a single batch, when the notes are reached
+        through `NoteProxy`.
+
+        Parameters
+        ----------
+        client : PyTriliumClient
+            The client to fetch the notes with.
+        window : float, optional
+            How many seconds to wait for more loads before a batch is sent, by default 0.002
+        max_batch : int, optional
+            How many loads a batch may have, by default 100
+        """
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+
+        self.lock = threading.Lock()
+        # ("note" or "content", noteId) -> the Future of its value
+        self.cache = {}
+        # The keys that still have to be fetched
+        self.pending = []
+        self.timer = None
+        # `loads` is every value that was asked for, `fetches` is the requests that were made, in `batches` batches
+        self.stats = {"loads": 0, "fetches": 0, "batches": 0}
+
+    def note(self, note_id: str):
+        """Get a lazy proxy for a note, which loads its information through this loader.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note.
+
+        Returns
+        -------
+        NoteProxy
+            The proxy for the note.
+        """
+        return NoteProxy(self, note_id)
+
+    def load(self, kind: str, note_id: str) -> Future:
+        """Ask for a note's information or content, without waiting for it.
+
+        Parameters
+        ----------
+        kind : str
+            Either "note" for the note's information, or "content" for its content.
+        note_id : str
+            Trilium's ID for the Note.
+
+        Returns
+        -------
+        Future
+            The Future of the note's information as a dictionary, or its content as a string.
+        """
+        key = (kind, note_id)
+        with self.lock:
+            self.stats["loads"] += 1
+            future = self.cache.get(key)
+            if future is not None:
+                return future
+            future = self.cache[key] = Future()
+            self.pending.append(key)
+            batch_full = len(self.pending) >= self.max_batch
+            if not batch_full and self.timer is None:
+                # Send the batch in the context of whoever started it, so that e.g. its tracing span carries over
+                self.timer = threading.Timer(self.window, contextvars.copy_context().run, args=(self.dispatch,))
+                self.timer.daemon = True
+                self.timer.start()
+        if batch_full:
+            self.dispatch()
+        return future
+
+    def get(self, kind: str, note_id: str):
+        """Get a note's information or content, waiting for it if needed.
+
+        Parameters
+        ----------
+        kind : str
+            Either "note" for the note's information, or "content" for its content.
+        note_id : str
+            Trilium's ID for the Note.
+
+        Returns
+        -------
+        dict or str
+            The note's information as a dictionary, or its content as a string.
+        """
+        return self.load(kind, note_id).result()
+
+    def peek(self, kind: str, note_id: str):
+        """Get a note's information or content if it was already loaded, without fetching it.
+
+        Parameters
+        ----------
+        kind : str
+            Either "note" for the note's information, or "content" for its content.
+        note_id : str
+            Trilium's ID for the Note.
+
+        Returns
+        -------
+        dict or str or None
+            The note's information as a dictionary, or its content as a string, or None if it isn't loaded (yet).
+        """
+        with self.lock:
+            future = self.cache.get((kind, note_id))
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def dispatch(self) -> None:
+        """Send the loads that are waiting, as one batch."""
+        with self.lock:
+            # Hold on to the Futures, `clear` may forget their keys while the batch is being fetched
+            batch = [(key, self.cache[key]) for key in self.pending]
+            self.pending = []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if batch:
+                self.stats["batches"] += 1
+                self.stats["fetches"] += len(batch)
+        if not batch:
+            return
+
+        results = self.client.map_concurrently(self._fetch, [key for key, _ in batch])
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def clear(self) -> None:
+        """Forget everything that was loaded, so that it is fetched again the next time it is needed."""
+        with self.lock:
+            for key in list(self.cache):
+                if key not in self.pending:
+                    del self.cache[key]
+
+    def _fetch(self, key):
+        kind, note_id = key
+        if kind == "note":
+            resp = self.client.make_request(f"/notes/{note_id}")
+        else:
+            # The note's blobId tells the disk cache (if any) if the content it has is still current
+            note = self.cache.get(("note", note_id))
+            cache_validator = None
+            if note is not None and note.done() and note.exception() is None:
+                cache_validator = note.result().get("blobId")
+            resp = self.client.make_request(f"/notes/{note_id}/content", cache_validator=cache_validator)
+        if resp.status_code not in self.client.valid_response_codes:
+            raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+        return resp.json() if kind == "note" else resp.text
+
+
+class NoteProxy:
+    def __init__(self, loader: NoteLoader, note_id: str, siblings: list = None) -> None:
+        """Initializes the NoteProxy class, a note whose information is only fetched when it's used. Loading anything for
+        a note also loads it for its siblings (the other notes from the same `children` or `parents` list), so that a
+        loop over the children turns into one batch of requests instead of one request per child. Only the contents of
+        siblings that are known to be text, code or mermaid notes are loaded along, so that reading one child's content
+        doesn't download every image and file next to it.
+
+        Use `PyTriliumNoteClient.note` to create one.
+
+        Parameters
+        ----------
+        loader : NoteLoader
+            The loader to fetch the note with.
+        note_id : str
+            Trilium's ID for the Note.
+        siblings : list, optional
+            The proxies that were created together with this one, by default None (only this note)
+        """
+        self.loader = loader
+        self.note_id = note_id
+        self.siblings = siblings if siblings is not None else [self]
+
+    def __repr__(self) -> str:
+        return f"NoteProxy({self.note_id!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NoteProxy) and other.loader is self.loader and other.note_id == self.note_id
+
+    def __hash__(self) -> int:
+        return hash(self.note_id)
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    @property
+    def data(self) -> dict:
+        """The note's information, as returned by `get_note_by_id`."""
+        return self._get("note")
+
+    @property
+    def title(self) -> str:
+        """The note's title."""
+        return self.data["title"]
+
+    @property
+    def type(self) -> str:
+        """The note's type, e.g. "text"."""
+        return self.data["type"]
+
+    @property
+    def attributes(self) -> list:
+        """The note's own attributes."""
+        return self.data["attributes"]
+
+    @property
+    def content(self) -> str:
+        """The note's content."""
+        return self._get("content")
+
+    @property
+    def children(self) -> list:
+        """Proxies for the note's children, in order. Their information is already being loaded."""
+        return self._related("childNoteIds")
+
+    @property
+    def parents(self) -> list:
+        """Proxies for the note's parents. Their information is already being loaded."""
+        return self._related("parentNoteIds")
+
+    def _get(self, kind: str):
+        for sibling in self.siblings:
+            if kind == "note" or sibling is self or sibling._has_text_content():
+                self.loader.load(kind, sibling.note_id)
+        return self.loader.get(kind, self.note_id)
+
+    def _has_text_content(self) -> bool:
+        note = self.loader.peek("note", self.note_id)
+        return note is not None and note.get("type") in PREFETCHED_CONTENT_TYPES
+
+    def _related(self, field: str) -> list:
+        siblings = []
+        siblings.extend(NoteProxy(self.loader, note_id, siblings) for note_id in self.data[field])
+        for proxy in siblings:
+            self.loader.load("note", proxy.note_id)
+        return siblings
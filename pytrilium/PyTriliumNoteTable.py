@@ -0,0 +1,356 @@
+# NumPy is optional, it's only needed for the note tables
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The dictionary-encoded columns, and the dictionary that each one's codes point into
+NOTE_DICTIONARY_COLUMNS = {"type": "type", "mime": "mime"}
+ATTRIBUTE_DICTIONARY_COLUMNS = {"type": "attributeType", "name": "name", "value": "value"}
+
+
+def dictionary_encode(values: list):
+    """Dictionary-encode a list of values, i.e. replace every value with its position in a list of the distinct values.
+
+    Parameters
+    ----------
+    values : list
+        The values to encode.
+
+    Returns
+    -------
+    tuple
+        The codes as a NumPy array of int32, and the distinct values (the dictionary) as a NumPy array of objects, in the
+        order they first appear.
+    """
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32, count=len(values))
+    dictionary = np.empty(len(lookup), dtype=object)
+    dictionary[:] = list(lookup)
+    return codes, dictionary
+
+
+def parse_utc_dates(dates: list):
+    # Trilium's dates look like `2023-04-05 12:34:56.789Z`
+    return np.array([date[:23].replace(" ", "T") if date else "NaT" for date in dates], dtype="datetime64[ms]")
+
+
+class NoteTable:
+    def __init__(self, notes: dict, attributes: dict, dictionaries: dict) -> None:
+        """Initializes the NoteTable class, which holds the metadata of many notes and their attributes as columns of NumPy
+        arrays, so that reports over them run as vectorized operations instead of Python loops. Requires the `analytics`
+        extra, i.e. `pip install pytrilium[analytics]`.
+
+        The table has a row per note, in `notes`, and a row per attribute, in `attributes`. The attribute rows point at
+        their note's row with their "note" column. Text columns that repeat a lot (the types, mimes and the attributes'
+        types, names and values) are dictionary-encoded: they hold int32 codes that point into `dictionaries`.
+
+        Use `from_notes`, or `PyTriliumNoteClient.build_note_table`, to create one.
+
+        Parameters
+        ----------
+        notes : dict
+            The note columns: "noteId", "title", "type", "mime", "isProtected", "utcDateCreated", "utcDateModified", and
+            optionally "contentSize" (-1 where the size is unknown).
+        attributes : dict
+            The attribute columns: "note", "type", "name", "value" and "isInheritable".
+        dictionaries : dict
+            The distinct values of the dictionary-encoded columns: "type", "mime", "attributeType", "name" and "value".
+
+        Raises
+        ------
+        ImportError
+            If NumPy isn't installed.
+        """
+        if np is None:
+            raise ImportError("Note tables require NumPy, please install it with `pip install pytrilium[analytics]`.")
+        self.notes = notes
+        self.attributes = attributes
+        self.dictionaries = dictionaries
+
+    @classmethod
+    def from_notes(cls, notes: list, content_sizes: dict = None):
+        """Build a table from notes, as returned by `get_note_by_id` or `search`.
+
+        Parameters
+        ----------
+        notes : list
+            The notes, as dictionaries.
+        content_sizes : dict, optional
+            The size of every note's content in bytes, keyed by the note's ID, by default None (the table has no
+            "contentSize" column)
+
+        Returns
+        -------
+        NoteTable
+            The table.
+        """
+        if np is None:
+            raise ImportError("Note tables require NumPy, please install it with `pip install pytrilium[analytics]`.")
+
+        dictionaries = {}
+        note_columns = {
+            "noteId": np.array([note["noteId"] for note in notes], dtype=object),
+            "title": np.array([note.get("title", "") for note in notes], dtype=object),
+            "isProtected": np.array([bool(note.get("isProtected")) for note in notes], dtype=bool),
+            "utcDateCreated": parse_utc_dates([note.get("utcDateCreated") for note in notes]),
+            "utcDateModified": parse_utc_dates([note.get("utcDateModified") for note in notes]),
+        }
+        for column, dictionary in NOTE_DICTIONARY_COLUMNS.items():
+            note_columns[column], dictionaries[dictionary] = dictionary_encode(
+                [note.get(column) or "" for note in notes]
+            )
+        if content_sizes is not None:
+            note_columns["contentSize"] = np.array(
+                [content_sizes.get(note["noteId"], -1) for note in notes], dtype=np.int64
+            )
+
+        # Only the note's own attributes, inherited ones are listed on the note they're inherited from
+        rows = [
+            (row, attribute)
+            for row, note in enumerate(notes)
+            for attribute in note.get("attributes", [])
+            if attribute.get("noteId", note["noteId"]) == note["noteId"]
+        ]
+        attribute_columns = {
+            "note": np.array([row for row, _ in rows], dtype=np.int32),
+            "isInheritable": np.array([bool(attribute.get("isInheritable")) for _, attribute in rows], dtype=bool),
+        }
+        for column, dictionary in ATTRIBUTE_DICTIONARY_COLUMNS.items():
+            attribute_columns[column], dictionaries[dictionary] = dictionary_encode(
+                [attribute.get(column) or "" for _, attribute in rows]
+            )
+        return cls(note_columns, attribute_columns, dictionaries)
+
+    def __len__(self) -> int:
+        return len(self.notes["noteId"])
+
+    def code(self, dictionary: str, value) -> int:
+        """Get the code that a value has in a dictionary-encoded column.
+
+        Parameters
+        ----------
+        dictionary : str
+            The name of the dictionary, e.g. "name" for the attributes' names.
+        value : Any
+            The value.
+
+        Returns
+        -------
+        int
+            The value's code, or -1 if no row has that value.
+        """
+        matches = np.flatnonzero(self.dictionaries[dictionary] == value)
+        return int(matches[0]) if len(matches) else -1
+
+    def attribute_mask(self, name: str, value: str = None, type: str = "label"):
+        """Get which attribute rows have the given name (and value).
+
+        Parameters
+        ----------
+        name : str
+            The name of the attribute.
+        value : str, optional
+            Only match the attributes with this value, by default None (any value)
+        type : str, optional
+            The type of the attribute, "label" or "relation", by default "label"
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean mask over the attribute rows.
+        """
+        mask = (self.attributes["name"] == self.code("name", name)) & (
+            self.attributes["type"] == self.code("attributeType", type)
+        )
+        if value is not None:
+            mask &= self.attributes["value"] == self.code("value", value)
+        return mask
+
+    def note_mask(self, name: str, value: str = None, type: str = "label"):
+        """Get which notes have an attribute with the given name (and value).
+
+        Parameters
+        ----------
+        name : str
+            The name of the attribute.
+        value : str, optional
+            Only match the attributes with this value, by default None (any value)
+        type : str, optional
+            The type of the attribute, "label" or "relation", by default "label"
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean mask over the note rows.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.attributes["note"][self.attribute_mask(name, value, type)]] = True
+        return mask
+
+    def notes_with_label(self, name: str, value: str = None):
+        """Get the IDs of the notes that have a label.
+
+        Parameters
+        ----------
+        name : str
+            The name of the label.
+        value : str, optional
+            Only match the labels with this value, by default None (any value)
+
+        Returns
+        -------
+        numpy.ndarray
+            The IDs of the notes.
+        """
+        return self.notes["noteId"][self.note_mask(name, value)]
+
+    def notes_missing_label(self, name: str):
+        """Get the IDs of the notes that don't have a label.
+
+        Parameters
+        ----------
+        name : str
+            The name of the label.
+
+        Returns
+        -------
+        numpy.ndarray
+            The IDs of the notes.
+        """
+        return self.notes["noteId"][~self.note_mask(name)]
+
+    def count_by_label_value(self, name: str) -> dict:
+        """Count how many notes have each value of a label. A note that has the same value more than once is counted once.
+
+        Parameters
+        ----------
+        name : str
+            The name of the label.
+
+        Returns
+        -------
+        dict
+            The number of notes for every value of the label, from the most to the least common.
+        """
+        mask = self.attribute_mask(name)
+        values = self.dictionaries["value"]
+        # Count every (note, value) pair only once
+        pairs = np.unique(self.attributes["note"][mask].astype(np.int64) * len(values) + self.attributes["value"][mask])
+        counts = np.bincount(pairs % max(len(values), 1), minlength=len(values))
+        order = np.argsort(-counts, kind="stable")
+        return {values[code]: int(counts[code]) for code in order if counts[code]}
+
+    def count_by(self, column: str, mask=None) -> dict:
+        """Count how many notes have each value of a dictionary-encoded note column.
+
+        Parameters
+        ----------
+        column : str
+            The column, "type" or "mime".
+        mask : numpy.ndarray, optional
+            Only count the notes in this boolean mask over the note rows, by default None (every note)
+
+        Returns
+        -------
+        dict
+            The number of notes for every value, from the most to the least common.
+        """
+        values = self.dictionaries[NOTE_DICTIONARY_COLUMNS[column]]
+        codes = self.notes[column] if mask is None else self.notes[column][mask]
+        counts = np.bincount(codes, minlength=len(values))
+        order = np.argsort(-counts, kind="stable")
+        return {values[code]: int(counts[code]) for code in order if counts[code]}
+
+    def histogram(self, column: str = "contentSize", by: str = "type", bins: int = 10) -> dict:
+        """Get a histogram of a numeric note column for every value of a dictionary-encoded one, e.g. of the content sizes
+        for every note type. Every histogram uses the same bins, so that they can be compared.
+
+        Parameters
+        ----------
+        column : str, optional
+            The numeric column, by default "contentSize"
+        by : str, optional
+            The dictionary-encoded column to group by, "type" or "mime", by default "type"
+        bins : int, optional
+            The number of bins, by default 10
+
+        Returns
+        -------
+        dict
+            The bin edges under "edges", and the counts per bin for every value of `by` under "counts".
+
+        Raises
+        ------
+        ValueError
+            If the table has no such column, e.g. "contentSize" when the table was built without content sizes.
+        """
+        if column not in self.notes:
+            raise ValueError(f"This table has no {column} column.")
+        known = self.notes[column] >= 0 if column == "contentSize" else np.ones(len(self), dtype=bool)
+        values = self.notes[column][known]
+        groups = self.notes[by][known]
+        edges = np.histogram_bin_edges(values, bins=bins)
+        counts = {
+            group: np.histogram(values[groups == code], bins=edges)[0]
+            for code, group in enumerate(self.dictionaries[NOTE_DICTIONARY_COLUMNS[by]])
+            if np.any(groups == code)
+        }
+        return {"edges": edges, "counts": counts}
+
+    def select(self, mask):
+        """Get a table with only some of the notes, and their attributes. The dictionaries are shared with this table.
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+            A boolean mask over the note rows, e.g. `table.note_mask("todo") & (table.notes["isProtected"] == False)`.
+
+        Returns
+        -------
+        NoteTable
+            The table with the selected notes.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        # The new row of every note that is kept
+        new_rows = np.cumsum(mask, dtype=np.int64) - 1
+        kept_attributes = mask[self.attributes["note"]]
+        attributes = {column: values[kept_attributes] for column, values in self.attributes.items()}
+        attributes["note"] = new_rows[attributes["note"]].astype(np.int32)
+        notes = {column: values[mask] for column, values in self.notes.items()}
+        return NoteTable(notes, attributes, self.dictionaries)
+
+    def to_pandas(self):
+        """Convert the table to pandas DataFrames, with the dictionary-encoded columns as categoricals. Requires pandas.
+
+        Returns
+        -------
+        tuple
+            A DataFrame with a row per note, and a DataFrame with a row per attribute (with the note's ID in "noteId").
+        """
+        import pandas as pd
+
+        notes = pd.DataFrame(
+            {
+                column: (
+                    pd.Categorical.from_codes(values, categories=self.dictionaries[NOTE_DICTIONARY_COLUMNS[column]])
+                    if column in NOTE_DICTIONARY_COLUMNS
+                    else values
+                )
+                for column, values in self.notes.items()
+            }
+        )
+        attributes = pd.DataFrame(
+            {
+                column: (
+                    pd.Categorical.from_codes(
+                        values, categories=self.dictionaries[ATTRIBUTE_DICTIONARY_COLUMNS[column]]
+                    )
+                    if column in ATTRIBUTE_DICTIONARY_COLUMNS
+                    else values
+                )
+                for column, values in self.attributes.items()
+            }
+        )
+        attributes.insert(0, "noteId", self.notes["noteId"][self.attributes["note"]])
+        return notes, attributes
@@ -0,0 +1,228 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from . import log
+from .PyTrilium import PyTrilium
+
+
+class PyTriliumPool:
+    def __init__(self, instances: dict, pool_maxsize: int = 10, max_workers: int = None, debug: bool = False) -> None:
+        """Initializes the PyTriliumPool class, which manages connections to several Trilium instances at once. Each instance
+        gets its own `PyTrilium` client, with its own connection pool. An instance that can't be connected to doesn't stop
+        the others from being used: it is left out of `healthy`, its error is kept in `failed`, and `check_health` tries to
+        connect to it again.
+
+        Parameters
+        ----------
+        instances : dict
+            The instances to connect to, keyed by the name you want to refer to them by. The values are either already
+            created `PyTrilium` clients, or the keyword arguments to create one with, e.g.
+            `{"team-a": {"url": "https://a.example.com", "token": "..."}}`
+        pool_maxsize : int, optional
+            The maximum number of connections to keep open to each instance, by default 10
+        max_workers : int, optional
+            How many requests to run at the same time when fanning out to every instance, by default one per instance
+        debug : bool, optional
+            If you would like to enable debugging, set this to True, by default False
+        """
+        self.logger = log.get_logger(
+            logger_name="PyTriliumPool",
+            log_file_name="PyTriliumPool.log",
+            debug=debug,
+            create_log_file=False,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(len(instances), 1))
+
+        self.instances = dict(instances)
+        self.pool_maxsize = pool_maxsize
+        self.debug = debug
+        self.clients = {}
+        # The instances that couldn't be connected to, with the error they raised
+        self.failed = {}
+        self.healthy = set()
+        self.connect(list(instances))
+
+    def connect(self, keys: list) -> dict:
+        """Connects to the given instances at the same time, since each one does a call to validate the token. The ones
+        that connect are added to `clients` and `healthy`, and the others are put in `failed` with their error.
+
+        Parameters
+        ----------
+        keys : list
+            The keys of the instances to connect to.
+
+        Returns
+        -------
+        dict
+            If each instance could be connected to, keyed by the instance's key.
+        """
+
+        def connect_instance(key):
+            instance = self.instances[key]
+            if isinstance(instance, PyTrilium):
+                return instance
+            return PyTrilium(pool_maxsize=self.pool_maxsize, debug=self.debug, **instance)
+
+        futures = {key: self.executor.submit(connect_instance, key) for key in keys}
+        connected = {}
+        for key, future in futures.items():
+            try:
+                self.clients[key] = future.result()
+            except Exception as e:
+                self.logger.warning(f"Connecting to instance {key} failed: {e}")
+                self.failed[key] = e
+                self.healthy.discard(key)
+                connected[key] = False
+                continue
+            self.failed.pop(key, None)
+            self.healthy.add(key)
+            connected[key] = True
+        return connected
+
+    def __getitem__(self, key: str) -> PyTrilium:
+        return self.clients[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.clients
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def keys(self) -> list:
+        """Returns the keys of every instance in the pool that could be connected to.
+
+        Returns
+        -------
+        list
+            The keys of the instances.
+        """
+        return list(self.clients)
+
+    def call(self, key: str, method: str, *args, **kwargs):
+        """Calls a method on the client of a single instance.
+
+        Parameters
+        ----------
+        key : str
+            The key of the instance to route the call to.
+        method : str
+            The name of the `PyTrilium` method to call, e.g. `get_note_by_id`
+
+        Returns
+        -------
+        Any
+            Whatever the method returns.
+        """
+        return getattr(self.clients[key], method)(*args, **kwargs)
+
+    def map(
+        self,
+        method: str,
+        *args,
+        keys: list = None,
+        healthy_only: bool = True,
+        return_exceptions: bool = False,
+        **kwargs,
+    ):
+        """Calls a method on the clients of several instances at the same time.
+
+        Parameters
+        ----------
+        method : str
+            The name of the `PyTrilium` method to call, e.g. `get_app_info`
+        keys : list, optional
+            The keys of the instances to call, by default None (every instance)
+        healthy_only : bool, optional
+            If True, the instances that failed their last health check are skipped, by default True
+        return_exceptions : bool, optional
+            If True, an exception raised by an instance is returned as its result, instead of being raised, by default False
+
+        Returns
+        -------
+        dict
+            The result of every instance, keyed by the instance's key.
+        """
+        if keys is None:
+            keys = self.keys()
+        if healthy_only:
+            keys = [key for key in keys if key in self.healthy]
+
+        futures = {key: self.executor.submit(self.call, key, method, *args, **kwargs) for key in keys}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                self.logger.warning(f"Calling {method} on instance {key} failed: {e}")
+                results[key] = e
+        return results
+
+    def check_health(self) -> dict:
+        """Checks if every instance is reachable, by fetching its app info, and tries to connect to the instances that
+        couldn't be connected to before. The instances that aren't reachable are skipped by `map` (and everything built on
+        top of it) until they pass a health check again.
+
+        Returns
+        -------
+        dict
+            If each instance is healthy, keyed by the instance's key.
+        """
+        health = self.connect(list(self.failed)) if self.failed else {}
+        results = self.map(
+            "get_app_info",
+            keys=[key for key in self.clients if key not in health],
+            healthy_only=False,
+            return_exceptions=True,
+        )
+        health.update({key: not isinstance(result, Exception) for key, result in results.items()})
+        self.healthy = {key for key, healthy in health.items() if healthy}
+        return health
+
+    def get_app_info_all(self) -> dict:
+        """Gets the app info of every instance at the same time.
+
+        Returns
+        -------
+        dict
+            The app info of every instance, keyed by the instance's key.
+        """
+        return self.map("get_app_info")
+
+    def search_all(self, query: str, merge: bool = True, **kwargs) -> dict:
+        """Searches every instance at the same time. Takes the same parameters as `PyTrilium.search`.
+
+        Parameters
+        ----------
+        query : str
+            The search query.
+        merge : bool, optional
+            If True, the results of every instance are merged into a single `{"results": [...]}` response, where each note
+            has an extra `instance` key with the key of the instance it came from. If False, the response of every instance
+            is returned keyed by the instance's key, by default True
+
+        Returns
+        -------
+        dict
+            The search results.
+        """
+        responses = self.map("search", query, **kwargs)
+        if not merge:
+            return responses
+
+        results = []
+        for key, response in responses.items():
+            results.extend({**note, "instance": key} for note in response.get("results", []))
+        return {"results": results}
+
+    def close(self) -> None:
+        """Closes the connections to every instance."""
+        for client in self.clients.values():
+            # The transport holds the connections, which is the session's, or httpx's client for HTTP/2
+            client.transport.close()
+            client.session.close()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,182 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# The lane that requests are scheduled in when none is given, see `PyTriliumClient.priority`. None is the scheduler's
+# `default_lane`
+CURRENT_LANE = contextvars.ContextVar("pytrilium_lane", default=None)
+
+# Interactive requests get 8 times the share of bulk requests, and bulk requests may never take up every slot
+DEFAULT_LANES = {
+    "interactive": {"weight": 8, "max_concurrent": None},
+    "bulk": {"weight": 1, "max_concurrent": 0.5},
+}
+
+
+class RequestScheduler:
+    def __init__(self, max_concurrent: int = 10, lanes: dict = None, default_lane: str = None) -> None:
+        """Initializes the RequestScheduler class, which limits how many requests are sent at the same time and decides
+        which waiting request goes next, so that a flood of background requests doesn't hold up interactive ones.
+
+        Every request is scheduled in a lane. While requests from several lanes are waiting, the free slots are shared by
+        weighted fair queuing, so a lane with weight 8 gets 8 requests sent for every 1 of a lane with weight 1, and no lane
+        is starved. A lane can also be capped to a number of slots, or to a fraction of `max_concurrent`.
+
+        Parameters
+        ----------
+        max_concurrent : int, optional
+            How many requests may be sent at the same time, across all lanes, by default 10
+        lanes : dict, optional
+            The lanes, as {name: {"weight": ..., "max_concurrent": ...}}. By default an "interactive" lane with weight 8,
+            and a "bulk" lane with weight 1 that may use half of the slots.
+        default_lane : str, optional
+            The lane of the requests that aren't given one, by default None ("interactive" if there is such a lane,
+            otherwise the first lane)
+
+        Raises
+        ------
+        ValueError
+            If `default_lane` isn't one of the lanes.
+        """
+        self.max_concurrent = max_concurrent
+
+        self.lock = threading.Condition()
+        self.lanes = {}
+        for name, lane in (lanes or DEFAULT_LANES).items():
+            cap = lane.get("max_concurrent")
+            if isinstance(cap, float):
+                cap = max(1, int(cap * max_concurrent))
+            self.lanes[name] = {
+                "weight": lane.get("weight", 1),
+                "max_concurrent": cap,
+                "active": 0,
+                # The requests waiting for a slot, in the order they arrived
+                "waiting": deque(),
+                # How much of the lane's share it has used, in weighted requests
+                "virtual_time": 0.0,
+            }
+        if default_lane is None:
+            default_lane = "interactive" if "interactive" in self.lanes else next(iter(self.lanes))
+        if default_lane not in self.lanes:
+            raise ValueError(f"Unknown default lane {default_lane!r}, the lanes are: {', '.join(self.lanes)}")
+        self.default_lane = default_lane
+        self.virtual_time = 0.0
+        self.active = 0
+        # lane -> `requests` that were sent, and the total and longest `queue_time` (in seconds) they waited for a slot
+        self.stats = {name: {"requests": 0, "queue_time": 0.0, "max_queue_time": 0.0} for name in self.lanes}
+
+    @contextmanager
+    def slot(self, lane: str):
+        """Waits for a free slot in the lane, and holds on to it while the context manager is open.
+
+        Parameters
+        ----------
+        lane : str
+            The name of the lane.
+
+        Yields
+        ------
+        float
+            How many seconds the request waited for its slot.
+
+        Raises
+        ------
+        ValueError
+            If there is no lane with that name.
+        """
+        queue_time = self.acquire(lane)
+        try:
+            yield queue_time
+        finally:
+            self.release(lane)
+
+    def acquire(self, lane: str) -> float:
+        """Waits for a free slot in the lane. Every call must be followed by a call to `release`.
+
+        Parameters
+        ----------
+        lane : str
+            The name of the lane.
+
+        Returns
+        -------
+        float
+            How many seconds the request waited for its slot.
+        """
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane {lane!r}, the lanes are: {', '.join(self.lanes)}")
+
+        started = time.monotonic()
+        ticket = object()
+        with self.lock:
+            state = self.lanes[lane]
+            if not state["waiting"] and not state["active"]:
+                # A lane that was idle picks up where the others are, instead of catching up on the share it didn't use
+                state["virtual_time"] = max(state["virtual_time"], self.virtual_time)
+            state["waiting"].append(ticket)
+            while self._next_ticket() is not ticket:
+                self.lock.wait()
+
+            state["waiting"].popleft()
+            state["active"] += 1
+            self.active += 1
+            self.virtual_time = state["virtual_time"]
+            state["virtual_time"] += 1 / state["weight"]
+
+            queue_time = time.monotonic() - started
+            stats = self.stats[lane]
+            stats["requests"] += 1
+            stats["queue_time"] += queue_time
+            stats["max_queue_time"] = max(stats["max_queue_time"], queue_time)
+            # Another slot may be free for the next waiting request
+            self.lock.notify_all()
+        return queue_time
+
+    def release(self, lane: str) -> None:
+        """Gives a slot in the lane back.
+
+        Parameters
+        ----------
+        lane : str
+            The name of the lane.
+        """
+        with self.lock:
+            self.lanes[lane]["active"] -= 1
+            self.active -= 1
+            self.lock.notify_all()
+
+    def get_stats(self) -> dict:
+        """Get how busy every lane is, and how long its requests waited for a slot.
+
+        Returns
+        -------
+        dict
+            For every lane, the number of `active` and `waiting` requests, how many `requests` were sent, and their
+            `average_queue_time` and `max_queue_time` in seconds.
+        """
+        with self.lock:
+            return {
+                name: {
+                    "active": state["active"],
+                    "waiting": len(state["waiting"]),
+                    "requests": self.stats[name]["requests"],
+                    "average_queue_time": self.stats[name]["queue_time"] / max(self.stats[name]["requests"], 1),
+                    "max_queue_time": self.stats[name]["max_queue_time"],
+                }
+                for name, state in self.lanes.items()
+            }
+
+    def _next_ticket(self):
+        # The first waiting request of the lane that has used the least of its share, among the lanes that are under their cap
+        if self.active >= self.max_concurrent:
+            return None
+        candidates = [
+            state
+            for state in self.lanes.values()
+            if state["waiting"] and (state["max_concurrent"] is None or state["active"] < state["max_concurrent"])
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda state: state["virtual_time"])["waiting"][0]
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        """Initializes the SingleFlight class, which makes sure that only one call for the same key is running at a time.
+        Callers that ask for a key that is already being fetched wait for that call and share its result, instead of
+        making their own.
+
+        This works with threads, and so also with asyncio code that runs the client through `asyncio.to_thread` or
+        `loop.run_in_executor`.
+        """
+        self.lock = threading.Lock()
+        # key -> the Future of the call that is currently running for it
+        self.in_flight = {}
+        # `calls` is every call that was made, `coalesced` is the calls that shared another call's result
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, func):
+        """Calls the function, unless a call for the same key is already running, in which case its result is returned.
+
+        Parameters
+        ----------
+        key : hashable
+            What identifies identical calls.
+        func : callable
+            The function to call, without arguments.
+
+        Returns
+        -------
+        Any
+            What the function returned, either for this call or for the call it was coalesced with. If that call raised
+            an exception, it is raised here as well.
+        """
+        with self.lock:
+            self.stats["calls"] += 1
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key) -> None:
+        # Calls that come in from now on start a new request, instead of getting this (possibly stale) result
+        with self.lock:
+            del self.in_flight[key]
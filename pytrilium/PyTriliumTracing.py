@@ -0,0 +1,112 @@
+import contextvars
+import functools
+from contextlib import nullcontext
+
+from requests.adapters import Retry
+
+# Local imports
+from . import __version__
+
+# OpenTelemetry is optional, it's only needed when tracing is enabled
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+class NoOpSpan:
+    """Stands in for a span while tracing is disabled, and ignores everything that is recorded on it."""
+
+    def set_attribute(self, key, value) -> None:
+        pass
+
+    def add_event(self, name, attributes=None) -> None:
+        pass
+
+    def record_exception(self, exception, attributes=None) -> None:
+        pass
+
+
+NOOP_SPAN = NoOpSpan()
+
+# The span of the request that is being sent on this thread, which its retries are recorded on, see `TracingRetry`
+REQUEST_SPAN = contextvars.ContextVar("pytrilium_request_span", default=NOOP_SPAN)
+
+
+class PyTriliumTracer:
+    def __init__(self, tracer=None) -> None:
+        """Initializes the PyTriliumTracer class, which opens the spans for the client's methods and requests. Without a
+        tracer, nothing is recorded and opening a span costs next to nothing.
+
+        Parameters
+        ----------
+        tracer : opentelemetry.trace.Tracer, optional
+            The OpenTelemetry tracer to record the spans with, by default None (tracing is disabled)
+        """
+        self.tracer = tracer
+        self.enabled = tracer is not None
+
+    def span(self, name: str, attributes: dict = None):
+        """Opens a span, as a child of the span that is currently open.
+
+        Parameters
+        ----------
+        name : str
+            The name of the span.
+        attributes : dict, optional
+            The attributes to set on the span, by default None
+
+        Returns
+        -------
+        contextmanager
+            The context manager that opens the span, and gives the span when entered.
+        """
+        if not self.enabled:
+            return nullcontext(NOOP_SPAN)
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+
+def get_otel_tracer():
+    """Gets an OpenTelemetry tracer for PyTrilium from the globally configured tracer provider.
+
+    Returns
+    -------
+    opentelemetry.trace.Tracer
+        The tracer.
+
+    Raises
+    ------
+    ImportError
+        If OpenTelemetry isn't installed.
+    """
+    if otel_trace is None:
+        raise ImportError("Tracing requires OpenTelemetry, please install it with `pip install pytrilium[tracing]`.")
+    return otel_trace.get_tracer("pytrilium", __version__)
+
+
+def traced(func):
+    """Decorates a client method, so that every call to it is recorded in a span named after it."""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.tracer.span(f"pytrilium.{func.__name__}"):
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class TracingRetry(Retry):
+    """urllib3's `Retry`, which also records every retry as an event on the span of the request being retried. Only the
+    span in `REQUEST_SPAN` is recorded on, so nothing is recorded while the client's tracing is disabled, even when the
+    app has spans of its own open."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        span = REQUEST_SPAN.get()
+        if span is not NOOP_SPAN:
+            attributes = {"retry.attempt": len(self.history) + 1}
+            if response is not None:
+                attributes["http.response.status_code"] = response.status
+            if error is not None:
+                attributes["error.type"] = type(error).__name__
+            span.add_event("retry", attributes)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
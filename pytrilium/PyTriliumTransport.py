@@ -0,0 +1,370 @@
+import contextvars
+import time
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, HTTPError, MaxRetryError, ProtocolError, ReadTimeoutError
+from urllib3.util import Retry, Timeout
+
+# httpx is optional, it's only needed for the HTTP/2 transport
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# The headers from the requests session that aren't passed on to httpx
+HTTPX_SKIPPED_HEADERS = ["accept-encoding", "connection", "keep-alive"]
+
+# How many bytes of a response body to read at a time, when the body has to be read before a deadline
+BODY_CHUNK_SIZE = 64 * 1024
+
+# When the request that is being sent on this thread has to be done by (in `time.monotonic()` seconds), see
+# `PyTriliumClient.DeadlineRetry`
+REQUEST_DEADLINE = contextvars.ContextVar("pytrilium_request_deadline", default=None)
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    """Raised when a request, including its retries and reading its body, takes longer than its timeout."""
+
+
+class RetriedResponse:
+    """What urllib3's `Retry` needs to know about an httpx response, to decide if and when to retry it."""
+
+    def __init__(self, response) -> None:
+        self.status = response.status_code
+        self.headers = response.headers
+
+    def get_redirect_location(self):
+        # httpx handles redirects itself
+        return False
+
+
+class DeadlineTimeout(Timeout):
+    """urllib3's `Timeout`, which only gives every connect and read of a request (and of its retries) the time that is left
+    until the request's deadline."""
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        super().__init__(connect=self.remaining(), read=self.remaining())
+
+    def remaining(self) -> float:
+        # A timeout of 0 would make the socket non-blocking, so always leave a little time
+        return max(self.deadline - time.monotonic(), 0.001)
+
+    def clone(self):
+        return DeadlineTimeout(self.deadline)
+
+    @property
+    def connect_timeout(self) -> float:
+        return self.remaining()
+
+    @property
+    def read_timeout(self) -> float:
+        return self.remaining()
+
+
+class PyTriliumTransport:
+    """The interface that `PyTriliumClient.make_request` sends its requests through. Subclass this to send requests some
+    other way, and pass an instance of it to `PyTriliumClient.set_transport`.
+
+    The responses that are returned must behave like a `requests.Response`, i.e. have `status_code`, `headers`, `text`,
+    `content` and `json()`.
+    """
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data="",
+        params: dict = None,
+        headers: dict = None,
+        timeout: float = None,
+        stream: bool = False,
+    ):
+        """Sends a request.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method to use.
+        url : str
+            The full URL to send the request to.
+        data : str or bytes, optional
+            The body of the request, by default ""
+        params : dict, optional
+            The query parameters of the request, by default None
+        headers : dict, optional
+            Extra headers for this request, on top of the client's headers, by default None
+        timeout : float, optional
+            How many seconds the request may take, including its retries and reading its body. For a streamed request,
+            it's how long it may take until the headers are in, and how long each read of the body may take, by default
+            None (wait forever)
+        stream : bool, optional
+            If True, the body isn't read yet, so that it can be read in chunks with `iter_content`, by default False
+
+        Returns
+        -------
+        requests.Response
+            The response, or something that behaves like it.
+
+        Raises
+        ------
+        requests.Timeout
+            If the request didn't finish within its timeout.
+        """
+        raise NotImplementedError
+
+    def iter_content(self, response, chunk_size: int):
+        """Reads the body of a response that was made with `stream=True`, in chunks.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response to read.
+        chunk_size : int
+            How many bytes to read at a time.
+
+        Returns
+        -------
+        Iterator[bytes]
+            The chunks of the body.
+        """
+        return response.iter_content(chunk_size=chunk_size)
+
+    def close_response(self, response) -> None:
+        """Releases the connection of a response that was made with `stream=True`.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response to close.
+        """
+        response.close()
+
+    def close(self) -> None:
+        """Closes the transport's connections."""
+
+
+class RequestsTransport(PyTriliumTransport):
+    def __init__(self, session: requests.Session) -> None:
+        """Initializes the RequestsTransport class, which sends requests through a `requests.Session`. This is the default
+        transport. It speaks HTTP/1.1, and decodes gzip and deflate responses, plus brotli and zstd responses when the
+        `brotli` and `zstandard` packages are installed.
+
+        Parameters
+        ----------
+        session : requests.Session
+            The session to send the requests through.
+        """
+        self.session = session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data="",
+        params: dict = None,
+        headers: dict = None,
+        timeout: float = None,
+        stream: bool = False,
+    ):
+        if timeout is None:
+            return self.session.request(method, url, data=data, params=params, headers=headers, stream=stream)
+
+        deadline = time.monotonic() + timeout
+        token = REQUEST_DEADLINE.set(deadline)
+        try:
+            response = self.session.request(
+                method, url, data=data, params=params, headers=headers, timeout=DeadlineTimeout(deadline), stream=True
+            )
+        finally:
+            REQUEST_DEADLINE.reset(token)
+        if stream:
+            # The caller reads the body, and each of its reads may take as long as the whole request could
+            connection = response.raw.connection
+            if connection is not None and connection.sock is not None:
+                connection.sock.settimeout(timeout)
+        else:
+            self._read_body(response, deadline, timeout)
+        return response
+
+    def _read_body(self, response: requests.Response, deadline: float, timeout: float) -> None:
+        # Read the body as it arrives, and give every read only the time that is left, so that a server that trickles
+        # the body out can't hold on to the request past its deadline
+        chunks = []
+        try:
+            while True:
+                connection = response.raw.connection
+                if connection is not None and connection.sock is not None:
+                    connection.sock.settimeout(max(deadline - time.monotonic(), 0.001))
+                chunk = response.raw.read1(BODY_CHUNK_SIZE, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if time.monotonic() >= deadline:
+                    raise DeadlineExceededError(f"The response wasn't read within the timeout of {timeout} seconds")
+        except ReadTimeoutError as e:
+            response.close()
+            raise DeadlineExceededError(f"The response wasn't read within the timeout of {timeout} seconds") from e
+        except Exception:
+            response.close()
+            raise
+        response._content = b"".join(chunks)
+        response._content_consumed = True
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HTTPXTransport(PyTriliumTransport):
+    def __init__(
+        self,
+        headers: dict,
+        http2: bool = True,
+        max_connections: int = 100,
+        verify: bool = True,
+        retries: Retry = None,
+        http2_prior_knowledge: bool = False,
+    ) -> None:
+        """Initializes the HTTPXTransport class, which sends requests through `httpx`. With HTTP/2, many requests that are
+        made at the same time share a single connection, instead of each one needing its own. Requires the `http2` extra,
+        i.e. `pip install pytrilium[http2]`.
+
+        Parameters
+        ----------
+        headers : dict
+            The headers to send with every request. This is read on every request, so pass the client's
+            `session.headers` to pick up the authorization token when it is set.
+        http2 : bool, optional
+            If HTTP/2 should be used when the server supports it, by default True
+        max_connections : int, optional
+            The maximum number of connections to keep open, by default 100
+        verify : bool, optional
+            If the server's TLS certificate should be verified, by default True
+        retries : urllib3.util.Retry, optional
+            When to retry a request, and how long to wait in between. Pass the client's `retries` to retry like the
+            default transport does, by default None (requests aren't retried)
+        http2_prior_knowledge : bool, optional
+            If HTTP/2 should be spoken right away, without asking the server first. Only use this for servers that speak
+            HTTP/2 over plain http:// connections, by default False
+
+        Raises
+        ------
+        ImportError
+            If httpx (or the h2 package, for HTTP/2) isn't installed.
+        """
+        if httpx is None:
+            raise ImportError(
+                "The HTTPX transport requires httpx, please install it with `pip install pytrilium[http2]`."
+            )
+
+        self.headers = headers
+        self.retries = retries
+        self.client = httpx.Client(
+            http1=not http2_prior_knowledge,
+            http2=http2 or http2_prior_knowledge,
+            verify=verify,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data="",
+        params: dict = None,
+        headers: dict = None,
+        timeout: float = None,
+        stream: bool = False,
+    ):
+        # Let httpx advertise the encodings that it can actually decode, and leave out the HTTP/1.1 only headers
+        request_headers = {
+            key: value for key, value in self.headers.items() if key.lower() not in HTTPX_SKIPPED_HEADERS
+        }
+        request_headers.update(headers or {})
+        # Like requests, send dictionaries form-encoded, and strings and bytes as they are
+        body = {"data": data} if isinstance(data, dict) else {"content": data or None}
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        retries = self.retries
+        token = REQUEST_DEADLINE.set(deadline)
+        try:
+            while True:
+                request = self.client.build_request(
+                    method,
+                    url,
+                    params=params,
+                    headers=request_headers,
+                    timeout=max(deadline - time.monotonic(), 0.001) if deadline is not None else None,
+                    **body,
+                )
+                try:
+                    response = self.client.send(request, stream=True)
+                except httpx.TransportError as e:
+                    retries = self._retry_error(retries, method, url, e)
+                    continue
+
+                retried = RetriedResponse(response)
+                if retries is None or not retries.is_retry(
+                    method, response.status_code, bool(response.headers.get("Retry-After"))
+                ):
+                    break
+                try:
+                    retries = retries.increment(method, url, response=retried)
+                except MaxRetryError as e:
+                    if not retries.raise_on_status:
+                        break
+                    response.close()
+                    raise requests.exceptions.RetryError(e)
+                response.close()
+                retries.sleep(retried)
+        finally:
+            REQUEST_DEADLINE.reset(token)
+
+        if stream:
+            return response
+        if deadline is None:
+            response.read()
+            return response
+
+        # The reads of the body may only take the time that is left, and it's checked after every chunk, so that a
+        # server that trickles the body out can't hold on to the request past its deadline
+        request.extensions["timeout"]["read"] = max(deadline - time.monotonic(), 0.001)
+        chunks = []
+        try:
+            for chunk in response.iter_bytes():
+                chunks.append(chunk)
+                if time.monotonic() >= deadline:
+                    raise DeadlineExceededError(f"The response wasn't read within the timeout of {timeout} seconds")
+        except httpx.ReadTimeout as e:
+            raise DeadlineExceededError(f"The response wasn't read within the timeout of {timeout} seconds") from e
+        finally:
+            response.close()
+        response._content = b"".join(chunks)
+        return response
+
+    def _retry_error(self, retries: Retry, method: str, url: str, error: Exception) -> Retry:
+        # Tell urllib3's `Retry` what kind of error this was, so that e.g. a read error is only retried for methods that
+        # are safe to repeat, the same way as with the default transport
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+            urllib3_error = ConnectTimeoutError(str(error))
+        elif isinstance(error, httpx.ReadTimeout):
+            urllib3_error = ReadTimeoutError(None, url, str(error))
+        elif isinstance(error, (httpx.ReadError, httpx.RemoteProtocolError)):
+            urllib3_error = ProtocolError(str(error))
+        else:
+            raise error
+        if retries is None:
+            raise error
+        try:
+            retries = retries.increment(method, url, error=urllib3_error)
+        except HTTPError:
+            # Out of retries, or not worth retrying
+            raise error from None
+        retries.sleep()
+        return retries
+
+    def iter_content(self, response, chunk_size: int):
+        return response.iter_bytes(chunk_size=chunk_size)
+
+    def close(self) -> None:
+        self.client.close()
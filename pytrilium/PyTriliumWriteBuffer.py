@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+
+
+class WriteBuffer:
+    def __init__(self, client, window: float = 1.0, max_pending: int = 100) -> None:
+        """Initializes the WriteBuffer class, which holds on to note updates for a short while and merges the updates to the
+        same note, so that a burst of updates turns into a single write. The last content that was put for a note wins, and
+        the fields of every patch for a note are merged together.
+
+        Pending updates are written when they have waited for `window` seconds, when more than `max_pending` notes have
+        updates waiting, or when `flush` is called. The writes for a note never overtake each other. When a write fails,
+        the note's updates go back into the buffer (merged with any that were queued in the meantime) and are tried again
+        after another window. Until they are written, their error is returned by `flush` and `close`.
+
+        Use `PyTriliumNoteClient.write_buffer` to create one, and `close` it (or use it as a context manager) when you're
+        done, so that the remaining updates are written.
+
+        Parameters
+        ----------
+        client : PyTriliumClient
+            The client to write the updates with.
+        window : float, optional
+            How many seconds an update may wait before it is written, by default 1.0
+        max_pending : int, optional
+            How many notes may have updates waiting before they're all written, by default 100
+        """
+        self.client = client
+        self.window = window
+        self.max_pending = max_pending
+
+        self.lock = threading.Condition()
+        # noteId -> {"content": the latest content or None, "patch": the merged patch or None, "queued_at": monotonic time}
+        self.pending = {}
+        # noteId -> the lock that is held while that note's updates are being written, to keep them in order
+        self.note_locks = {}
+        # `queued` is every update that was made, `written` is the writes that were actually sent to Trilium
+        self.stats = {"queued": 0, "written": 0}
+        # noteId -> the error of the last attempt to write the note's updates, until they are written
+        self.errors = {}
+        self.closed = False
+
+        self.flush_thread = threading.Thread(target=self._flush_periodically, name="PyTriliumWriteBuffer", daemon=True)
+        self.flush_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def put_note_content(self, note_id: str, data: str) -> None:
+        """Queue an update of the Note's content. Replaces any content that is already waiting to be written for the Note.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note.
+        data : str
+            The Note's new content.
+        """
+        self._queue(note_id, "content", data)
+
+    def patch_note(self, note_id: str, data) -> None:
+        """Queue an update of the Note's metadata. The fields are merged into any patch that is already waiting to be
+        written for the Note.
+
+        Parameters
+        ----------
+        note_id : str
+            Trilium's ID for the Note.
+        data : dict or str
+            The fields to update, either as a dictionary or as a JSON string.
+        """
+        if isinstance(data, str):
+            data = json.loads(data)
+        self._queue(note_id, "patch", data)
+
+    def flush(self, note_ids: list = None) -> dict:
+        """Write the pending updates now.
+
+        Parameters
+        ----------
+        note_ids : list, optional
+            Only write the updates for these notes, by default None (write every pending update)
+
+        Returns
+        -------
+        dict
+            The exceptions for the notes whose updates could not be written (now, or by an earlier background flush), keyed
+            by the note's ID. Their updates are still in the buffer.
+        """
+        with self.lock:
+            all_notes = note_ids is None
+            if all_notes:
+                note_ids = list(self.pending)
+        for note_id in note_ids:
+            try:
+                self._flush_note(note_id)
+            except Exception as e:
+                self.client.logger.warning(f"Writing the buffered updates of note {note_id} failed: {e}")
+        with self.lock:
+            return {note_id: error for note_id, error in self.errors.items() if all_notes or note_id in note_ids}
+
+    def close(self) -> dict:
+        """Stop the background flushing, and write the remaining updates.
+
+        Returns
+        -------
+        dict
+            The exceptions for the notes whose updates could not be written, keyed by the note's ID. These updates are
+            lost once the buffer is closed.
+        """
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.flush_thread.join()
+        return self.flush()
+
+    def _queue(self, note_id: str, kind: str, data) -> None:
+        with self.lock:
+            if self.closed:
+                raise ValueError("This write buffer has been closed.")
+            entry = self.pending.get(note_id)
+            if entry is None:
+                entry = self.pending[note_id] = {"content": None, "patch": None, "queued_at": time.monotonic()}
+                # Let the flushing thread know when this note's window ends
+                self.lock.notify_all()
+            if kind == "patch":
+                entry["patch"] = {**(entry["patch"] or {}), **data}
+            else:
+                entry["content"] = data
+            self.stats["queued"] += 1
+            self.note_locks.setdefault(note_id, threading.Lock())
+            too_many_pending = len(self.pending) > self.max_pending
+
+        if too_many_pending:
+            self.flush()
+
+    def _flush_note(self, note_id: str) -> None:
+        with self.lock:
+            note_lock = self.note_locks.get(note_id)
+        if note_lock is None:
+            return
+
+        # Only take the pending updates once the previous write for this note is done, so that writes stay in order
+        with note_lock:
+            with self.lock:
+                entry = self.pending.pop(note_id, None)
+            if entry is None:
+                return
+
+            try:
+                if entry["patch"] is not None:
+                    self._check(
+                        self.client.make_request(f"/notes/{note_id}", method="PATCH", data=json.dumps(entry["patch"]))
+                    )
+                    entry["patch"] = None
+                if entry["content"] is not None:
+                    self._check(
+                        self.client.make_request(
+                            f"/notes/{note_id}/content", method="PUT", data=entry["content"].encode("utf-8")
+                        )
+                    )
+                    entry["content"] = None
+            except Exception as e:
+                self._requeue(note_id, entry, e)
+                raise
+            with self.lock:
+                self.errors.pop(note_id, None)
+
+    def _requeue(self, note_id: str, entry: dict, error: Exception) -> None:
+        # Put the updates that weren't written back, under any that were queued while they were being written, so that
+        # the newer content still wins and the newer patch fields still override the older ones
+        with self.lock:
+            self.errors[note_id] = error
+            newer = self.pending.get(note_id)
+            if newer is not None:
+                if newer["content"] is None:
+                    newer["content"] = entry["content"]
+                if entry["patch"] is not None:
+                    newer["patch"] = {**entry["patch"], **(newer["patch"] or {})}
+            else:
+                # Try again after another window, instead of right away
+                self.pending[note_id] = {**entry, "queued_at": time.monotonic()}
+            self.lock.notify_all()
+
+    def _check(self, resp) -> None:
+        if resp.status_code not in self.client.valid_response_codes:
+            raise ValueError(f"Invalid response code: {str(resp.status_code)}, response text: {resp.text}")
+        with self.lock:
+            self.stats["written"] += 1
+
+    def _flush_periodically(self) -> None:
+        while True:
+            with self.lock:
+                if self.closed:
+                    return
+                now = time.monotonic()
+                due = [note_id for note_id, entry in self.pending.items() if entry["queued_at"] + self.window <= now]
+                if not due:
+                    oldest = min((entry["queued_at"] for entry in self.pending.values()), default=now)
+                    self.lock.wait(timeout=max(oldest + self.window - now, 0.01) if self.pending else self.window)
+                    continue
+            self.flush(due)
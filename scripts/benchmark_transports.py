@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark the transports that PyTrilium can send its requests through.
+By default this starts small local servers that mimic Trilium's note content endpoint, one speaking HTTP/1.1 and one
+speaking HTTP/2 (with prior knowledge, so without TLS), but it can also be pointed at a real Trilium instance with --url
+and --token.
+"""
+
+import argparse
+import gzip
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pytrilium.PyTriliumClient import PyTriliumClient  # noqa: E402
+from pytrilium.PyTriliumTransport import HTTPXTransport  # noqa: E402
+
+# h2 is only needed for the local HTTP/2 server, it comes with the http2 extra
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+# Roughly what a long text note looks like
+NOTE_CONTENT = ("<p>The quick brown fox jumps over the <strong>lazy</strong> dog.</p>\n" * 4000).encode()
+
+
+class FakeTriliumHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body, headers = make_response(self.headers.get("Accept-Encoding", ""))
+        self.send_response(200)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeTriliumH2Handler(socketserver.BaseRequestHandler):
+    """Serves the same response as FakeTriliumHandler, over HTTP/2 with prior knowledge (i.e. without TLS)."""
+
+    def handle(self):
+        connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        connection.initiate_connection()
+        self.request.sendall(connection.data_to_send())
+        # stream ID -> the part of its body that still has to be sent
+        bodies = {}
+
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    body, headers = make_response(dict(event.headers).get("accept-encoding", ""))
+                    connection.send_headers(event.stream_id, [(":status", "200"), *headers.items()])
+                    bodies[event.stream_id] = body
+                elif isinstance(event, h2.events.StreamReset):
+                    bodies.pop(event.stream_id, None)
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+
+            # Send as much of every body as flow control allows, the rest goes out once the client updates the window
+            for stream_id, body in list(bodies.items()):
+                while body:
+                    size = min(connection.local_flow_control_window(stream_id), connection.max_outbound_frame_size)
+                    if size <= 0:
+                        break
+                    connection.send_data(stream_id, body[:size])
+                    body = body[size:]
+                if body:
+                    bodies[stream_id] = body
+                else:
+                    connection.end_stream(stream_id)
+                    del bodies[stream_id]
+            self.request.sendall(connection.data_to_send())
+
+
+def make_response(accept_encoding):
+    """Build the body and headers of a response to a request for the note's content."""
+    body = NOTE_CONTENT
+    headers = {"content-type": "text/html; charset=utf-8"}
+    if "gzip" in accept_encoding:
+        body = gzip.compress(body)
+        headers["content-encoding"] = "gzip"
+    headers["content-length"] = str(len(body))
+    return body, headers
+
+
+def start_local_server():
+    """Start the fake Trilium server on a free port, returning its URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTriliumHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_local_h2_server():
+    """Start the fake Trilium server that speaks HTTP/2 on a free port, returning its URL."""
+    if h2 is None:
+        raise ImportError("The local HTTP/2 server requires h2, please install it with `pip install pytrilium[http2]`.")
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeTriliumH2Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_client(url, token, transport_name, concurrency, http2_prior_knowledge=False):
+    """Create a client that sends its requests through the given transport."""
+    client = PyTriliumClient(url, token)
+    client.make_requests_session(pool_maxsize=concurrency)
+    client.set_session_auth(token)
+    if transport_name == "httpx-http1":
+        client.set_transport(
+            HTTPXTransport(client.session.headers, http2=False, max_connections=concurrency, retries=client.retries)
+        )
+    elif transport_name == "httpx-http2":
+        client.set_transport(
+            HTTPXTransport(
+                client.session.headers,
+                http2=True,
+                max_connections=concurrency,
+                retries=client.retries,
+                http2_prior_knowledge=http2_prior_knowledge,
+            )
+        )
+    return client
+
+
+def get_http_version(client):
+    """The HTTP version that the client's last response came over."""
+    response = client.make_request("/app-info")
+    return getattr(response, "http_version", "HTTP/1.1")
+
+
+def benchmark(client, endpoint, requests_count, concurrency):
+    """Make the requests, returning the total time taken and the decoded bytes received."""
+    # Warm up the connections so that we don't measure the handshakes
+    client.make_request(endpoint)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sizes = list(executor.map(lambda _: len(client.make_request(endpoint).content), range(requests_count)))
+    return time.perf_counter() - start, sum(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PyTrilium's transports")
+    parser.add_argument("--url", help="URL of a Trilium instance, by default a local fake server is started")
+    parser.add_argument("--token", default="benchmark", help="ETAPI token for --url")
+    parser.add_argument("--endpoint", default="/notes/root/content", help="The endpoint to request")
+    parser.add_argument("--requests", type=int, default=500, help="How many requests to make per transport")
+    parser.add_argument("--concurrency", type=int, default=16, help="How many requests to make at the same time")
+    args = parser.parse_args()
+
+    url = args.url or start_local_server()
+    transports = ["requests", "httpx-http1", "httpx-http2"]
+
+    print(f"🏁 {args.requests} requests to {url}{args.endpoint}, {args.concurrency} at a time")
+    for transport_name in transports:
+        try:
+            if transport_name == "httpx-http2" and not args.url:
+                # The local HTTP/1.1 server can't speak HTTP/2, so that gets a server of its own
+                client = make_client(
+                    start_local_h2_server(), args.token, transport_name, args.concurrency, http2_prior_knowledge=True
+                )
+            else:
+                client = make_client(url, args.token, transport_name, args.concurrency)
+        except ImportError as e:
+            print(f"⚠️  {transport_name}: skipped, {e}")
+            continue
+
+        elapsed, total_bytes = benchmark(client, args.endpoint, args.requests, args.concurrency)
+        http_version = get_http_version(client)
+        client.transport.close()
+        print(
+            f"✅ {transport_name:12} {http_version:9} {elapsed:7.2f}s  {args.requests / elapsed:8.1f} req/s  "
+            f"{total_bytes / elapsed / 1024 / 1024:8.1f} MiB/s decoded"
+        )
+
+
+if __name__ == "__main__":
+    main()